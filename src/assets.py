@@ -0,0 +1,192 @@
+import os
+import struct
+import sys
+import threading
+
+import pygame
+
+TEXTURE_DIR = os.path.join("..", "textures")
+TEXTURE_SCALE = 4
+# every texture already scaled, built with python assets.py
+BUNDLE_FILE = os.path.join(TEXTURE_DIR, "scaled.bundle")
+
+
+class AtlasPage:
+    """
+    One big surface that textures get packed into, shelf by shelf.
+    All textures on a page share its colorkey.
+    """
+    def __init__(self, size: tuple[int, int], colorkey: tuple[int, int, int] | None):
+        self.surface = pygame.Surface(size).convert()
+        if colorkey is not None:
+            self.surface.fill(colorkey)
+            # no RLEACCEL, a page is only ever blitted from through subsurfaces, which can't use it
+            self.surface.set_colorkey(colorkey)
+        self.shelf_x = 0
+        self.shelf_y = 0
+        self.shelf_height = 0
+
+    def insert(self, image: pygame.Surface) -> pygame.Surface | None:
+        width, height = image.get_size()
+        page_width, page_height = self.surface.get_size()
+        if self.shelf_x + width > page_width:
+            # next shelf
+            self.shelf_x = 0
+            self.shelf_y += self.shelf_height
+            self.shelf_height = 0
+        if width > page_width or self.shelf_y + height > page_height:
+            return None
+        rect = pygame.Rect(self.shelf_x, self.shelf_y, width, height)
+        self.surface.blit(image, rect)
+        self.shelf_x += width
+        self.shelf_height = max(self.shelf_height, height)
+        return self.surface.subsurface(rect)
+
+
+class AssetManager:
+    """
+    Loads every texture once, scaled by TEXTURE_SCALE and converted, and packs it into atlas pages.
+    Textures handed out are subsurfaces of a page, so all users share the same pixels.
+    Sheet frames are small and blitted a lot, they are handed out as RLE copies, which blit about twice as fast.
+    textures: keys are (file_name, colorkey)
+    sheets: keys are (file_name, colorkey, rects), rects are in scaled pixels
+
+    Textures come from the bundle if it has them at this scale and the file hasn't changed since,
+    otherwise they are decoded and scaled here.
+    Bundle layout:
+    header: magic, version, number of textures
+    per texture: name length, file modification time and size, scale, width, height, name, RGB pixels
+    """
+    PAGE_SIZE = (512, 512)
+    BUNDLE_MAGIC = b"PGAB"
+    BUNDLE_VERSION = 1
+    BUNDLE_HEADER = struct.Struct("<4sHI")
+    BUNDLE_ENTRY = struct.Struct("<HqqIII")
+
+    def __init__(self, texture_dir: str = TEXTURE_DIR, scale: int = TEXTURE_SCALE, bundle_file: str = BUNDLE_FILE):
+        self.texture_dir = texture_dir
+        self.scale = scale
+        self.bundle_file = bundle_file
+        self.bundle = None
+        self.textures = {}
+        self.sheets = {}
+        self.pages = {}
+        # chunks are built on worker threads
+        self.lock = threading.RLock()
+
+    def file_stamp(self, file_name: str) -> tuple[int, int] | None:
+        try:
+            stat = os.stat(os.path.join(self.texture_dir, file_name))
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def read_bundle(self) -> dict:
+        """
+        {file_name: (stamp, scale, size, pixels)}, the whole file in one read.
+        """
+        try:
+            with open(self.bundle_file, "rb") as file:
+                data = memoryview(file.read())
+        except OSError:
+            return {}
+        magic, version, count = self.BUNDLE_HEADER.unpack_from(data)
+        if magic != self.BUNDLE_MAGIC or version != self.BUNDLE_VERSION:
+            return {}
+        bundle = {}
+        i = self.BUNDLE_HEADER.size
+        for _ in range(count):
+            name_length, mtime, file_size, scale, width, height = self.BUNDLE_ENTRY.unpack_from(data, i)
+            i += self.BUNDLE_ENTRY.size
+            name = bytes(data[i:i + name_length]).decode()
+            i += name_length
+            bundle[name] = ((mtime, file_size), scale, (width, height), data[i:i + width * height * 3])
+            i += width * height * 3
+        return bundle
+
+    def write_bundle(self, file_names=None) -> int:
+        """
+        Scales every texture of texture_dir, or just file_names, into the bundle. Returns its size in bytes.
+        """
+        if file_names is None:
+            file_names = sorted(name for name in os.listdir(self.texture_dir) if name.endswith(".png"))
+        entries = []
+        for file_name in file_names:
+            image = pygame.transform.scale_by(pygame.image.load(os.path.join(self.texture_dir, file_name)), self.scale)
+            name = file_name.encode()
+            entries.append(self.BUNDLE_ENTRY.pack(len(name), *self.file_stamp(file_name), self.scale, *image.get_size())
+                           + name + pygame.image.tobytes(image, "RGB"))
+        data = self.BUNDLE_HEADER.pack(self.BUNDLE_MAGIC, self.BUNDLE_VERSION, len(entries)) + b"".join(entries)
+        with open(self.bundle_file, "wb") as file:
+            file.write(data)
+        self.bundle = None
+        return len(data)
+
+    def load(self, file_name: str) -> pygame.Surface:
+        if self.bundle is None:
+            self.bundle = self.read_bundle()
+        if file_name in self.bundle:
+            stamp, scale, size, pixels = self.bundle[file_name]
+            # a bundle without the source files is fine too
+            if scale == self.scale and self.file_stamp(file_name) in (stamp, None):
+                return pygame.image.frombuffer(pixels, size, "RGB").convert()
+        image = pygame.image.load(os.path.join(self.texture_dir, file_name)).convert()
+        return pygame.transform.scale_by(image, self.scale)
+
+    def pack(self, image: pygame.Surface, colorkey: tuple[int, int, int] | None) -> pygame.Surface:
+        pages = self.pages.setdefault(colorkey, [])
+        for page in pages:
+            if (packed := page.insert(image)) is not None:
+                return packed
+        page_size = (max(self.PAGE_SIZE[0], image.get_width()), max(self.PAGE_SIZE[1], image.get_height()))
+        pages.append(AtlasPage(page_size, colorkey))
+        return pages[-1].insert(image)
+
+    def texture(self, file_name: str, colorkey: tuple[int, int, int] | None = None) -> pygame.Surface:
+        key = (file_name, colorkey)
+        with self.lock:
+            if key not in self.textures:
+                self.textures[key] = self.pack(self.load(file_name), colorkey)
+            return self.textures[key]
+
+    def sheet(self, file_name: str, rects: tuple, colorkey: tuple[int, int, int] | None = None) -> tuple:
+        key = (file_name, colorkey, rects)
+        with self.lock:
+            if key not in self.sheets:
+                image = self.texture(file_name, colorkey)
+                self.sheets[key] = tuple(self.rle_copy(image.subsurface(rect), colorkey) for rect in rects)
+            return self.sheets[key]
+
+    @staticmethod
+    def rle_copy(image: pygame.Surface, colorkey: tuple[int, int, int] | None) -> pygame.Surface:
+        copy = image.copy()
+        if colorkey is not None:
+            copy.set_colorkey(colorkey, pygame.RLEACCEL)
+        return copy
+
+    @staticmethod
+    def surface_bytes(surface: pygame.Surface) -> int:
+        return surface.get_bytesize() * surface.get_width() * surface.get_height()
+
+    def stats(self) -> dict:
+        """
+        Memory is the pixels of the pages and of the sheet frame copies, without the RLE data SDL keeps for the latter.
+        """
+        pages = [page for pages in self.pages.values() for page in pages]
+        page_bytes = sum(self.surface_bytes(page.surface) for page in pages)
+        sheet_bytes = sum(self.surface_bytes(frame) for frames in self.sheets.values() for frame in frames)
+        return {"textures": len(self.textures),
+                "sheet frames": sum(len(frames) for frames in self.sheets.values()),
+                "pages": len(pages),
+                "page bytes": page_bytes,
+                "sheet bytes": sheet_bytes,
+                "bytes": page_bytes + sheet_bytes}
+
+
+# shared by the whole process
+assets = AssetManager()
+
+
+if __name__ == "__main__":
+    # python assets.py [texture file names]
+    print(f"{assets.write_bundle(sys.argv[1:] or None)} bytes written to {assets.bundle_file}")
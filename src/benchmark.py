@@ -0,0 +1,91 @@
+import os
+import sys
+
+# headless by default, e.g. on CI machines without a display
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+from chunk_map import TILE_IDS
+from game_loop import GameLoop, InputScript
+from profiler import profiler
+from global_settings import *
+import level_2
+from render_backend import create_backend
+
+K_A, K_D, K_SPACE = pygame.K_a, pygame.K_d, pygame.K_SPACE
+
+
+def walking(level, n_frames: int):
+    steps = []
+    while sum(step[0] for step in steps) < n_frames:
+        steps += [(40, (K_D,), (K_SPACE,)), (40, (K_D,), ()), (40, (K_A,), (K_SPACE,)), (20, (), ())]
+    return InputScript(steps), None
+
+
+def coin_field(level, n_frames: int):
+    # fill the air around the start with coins, before any chunk is loaded
+    start_x = int(level.player_group.sprite.pos.x) // TILE_SIZE
+    start_y = int(level.player_group.sprite.pos.y) // TILE_SIZE
+    for x in range(start_x - 20, start_x + 40):
+        for y in range(start_y - 12, start_y + 4):
+            if level.map.tile(x, y) == TILE_IDS["A"]:
+                level.map.set_tile(x, y, TILE_IDS["C"])
+    return walking(level, n_frames)
+
+
+def particle_bursts(level, n_frames: int):
+    def burst(frame: int) -> None:
+        if not frame % 10:
+            player = level.player_group.sprite
+            level.particles.emit(player.pos, 500, radius=16, radius_decay=0.25, speed=6, color=(255, 175, 0))
+    return InputScript([(n_frames, (), ())]), burst
+
+
+def fast_scrolling(level, n_frames: int):
+    level.player_group.sprite.acc.x = 10
+    return InputScript([(n_frames, (K_D,), ())]), None
+
+
+SCENARIOS = {"walking": walking,
+             "coin field": coin_field,
+             "particle bursts": particle_bursts,
+             "fast scrolling": fast_scrolling}
+
+
+def run_scenario(name: str, n_frames: int = 600, seed: int = 0, backend=None, trace: str | None = None) -> dict:
+    """
+    trace: profiles the run and exports it to trace_<scenario>.csv and .json
+    """
+    screen = pygame.display.get_surface() if backend is None else backend.screen
+    # synchronous chunk loading, worker threads would make runs irreproducible
+    level = level_2.Level(chunk_workers=0)
+    level.load_map()
+    input_script, before_frame = SCENARIOS[name](level, n_frames)
+    game_loop = GameLoop(level, screen, present=None if backend is None else backend.present)
+    profiler.enabled = trace is not None
+    profiler.frames.clear()
+    stats = game_loop.run(n_frames, input_script, throttle=False, seed=seed, before_frame=before_frame)
+    if trace is not None:
+        game_loop.export_profile(f"{trace}_{name.replace(' ', '_')}")
+        profiler.enabled = False
+    return stats.summary() | {"culled": round(level.cull_stats.culled_fraction(), 3)}
+
+
+def run_scenarios(names=None,
+                  n_frames: int = 600,
+                  seed: int = 0,
+                  backend_name: str = "surface",
+                  trace: str | None = None) -> dict:
+    pygame.init()
+    backend = create_backend(backend_name, (SCREEN_WIDTH, SCREEN_HEIGHT))
+    results = {name: run_scenario(name, n_frames, seed, backend, trace) for name in (names or SCENARIOS)}
+    pygame.quit()
+    return results
+
+
+if __name__ == "__main__":
+    # python benchmark.py [n_frames] [seed] [surface|texture] [trace name]
+    results = run_scenarios(None, *(int(arg) for arg in sys.argv[1:3]), *sys.argv[3:5])
+    for name, summary in results.items():
+        print(f"{name:16}", "  ".join(f"{key}: {value}" for key, value in summary.items()))
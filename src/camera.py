@@ -0,0 +1,73 @@
+import math
+
+import pygame
+
+from global_settings import SCREEN_WIDTH, SCREEN_HEIGHT
+
+
+class Camera:
+    """
+    Owns the scroll of the level, everything else lives in world coords.
+    pos: world coord of the top left of the screen, moves smoothly
+    offset: pos snapped to whole pixels, what gets subtracted from world coords once per draw batch
+    scroll_delay: the camera closes 1/scroll_delay of its distance to the target every step
+    previous_pos: pos at the start of the current step, for interpolation
+    vel: how far pos moved during the last step
+    """
+    def __init__(self,
+                 pos: tuple[float, float],
+                 size: tuple[int, int] = (SCREEN_WIDTH, SCREEN_HEIGHT),
+                 scroll_delay: tuple[float, float] = (32, 24)):
+        self.pos = list(pos)
+        self.size = size
+        self.scroll_delay = scroll_delay
+        self.previous_pos = tuple(pos)
+        self.vel = (0, 0)
+
+    @property
+    def offset(self) -> tuple[int, int]:
+        return math.floor(self.pos[0]), math.floor(self.pos[1])
+
+    @property
+    def center(self) -> tuple[float, float]:
+        return self.pos[0] + self.size[0]/2, self.pos[1] + self.size[1]/2
+
+    def begin_step(self) -> None:
+        self.previous_pos = tuple(self.pos)
+
+    def end_step(self) -> None:
+        self.vel = (self.pos[0] - self.previous_pos[0], self.pos[1] - self.previous_pos[1])
+
+    def jump_to(self, pos: tuple[float, float]) -> None:
+        """
+        Moves without scrolling, nothing to interpolate or predict from.
+        """
+        self.pos[:] = pos
+        self.previous_pos = tuple(pos)
+        self.vel = (0, 0)
+
+    def follow(self, axis: int, target: float) -> None:
+        """
+        Scrolls one axis towards having target in the middle of the screen.
+        """
+        self.pos[axis] += (target - self.size[axis]/2 - self.pos[axis]) / self.scroll_delay[axis]
+
+    def predicted_pos(self) -> tuple[float, float]:
+        # closing 1/scroll_delay of the distance every step, moving at vel it still has about vel * scroll_delay to go
+        return tuple(self.pos[i] + self.vel[i] * self.scroll_delay[i] for i in (0, 1))
+
+    def view_rect(self, pos: tuple[float, float] | None = None) -> pygame.Rect:
+        """
+        World rect on screen, at pos instead of the current position if given.
+        """
+        if pos is None:
+            return pygame.Rect(self.offset, self.size)
+        return pygame.Rect(math.floor(pos[0]), math.floor(pos[1]), *self.size)
+
+    def to_screen(self, world_rect: pygame.Rect) -> pygame.Rect:
+        offset = self.offset
+        return world_rect.move(-offset[0], -offset[1])
+
+    def to_world(self, screen_pos: tuple[float, float]) -> tuple[float, float]:
+        offset = self.offset
+        return screen_pos[0] + offset[0], screen_pos[1] + offset[1]
@@ -0,0 +1,51 @@
+from collections import OrderedDict
+
+
+class ChunkCache:
+    """
+    Chunks that left the screen but are kept resident, so they don't have to be rebuilt when they come back.
+    They are not updated or drawn while they are in here.
+    margin: chunks up to this many chunks away from the screen stay resident, the rest gets evicted
+    capacity: max number of resident chunks, least recently used ones are evicted first
+    on_evict: function (chunk_key, chunk) called for every evicted chunk
+    """
+    def __init__(self, capacity: int = 32, margin: int = 1, on_evict=None):
+        self.capacity = capacity
+        self.margin = margin
+        self.on_evict = on_evict
+        self.chunks = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, chunk_key: tuple[int, int]) -> bool:
+        return chunk_key in self.chunks
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def take(self, chunk_key: tuple[int, int]) -> dict | None:
+        chunk = self.chunks.pop(chunk_key, None)
+        if chunk is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return chunk
+
+    def put(self, chunk_key: tuple[int, int], chunk: dict) -> None:
+        self.chunks[chunk_key] = chunk
+        self.chunks.move_to_end(chunk_key)
+        while len(self.chunks) > self.capacity:
+            self.evict(*self.chunks.popitem(last=False))
+
+    def evict_outside(self, chunk_keys) -> None:
+        for chunk_key in [chunk_key for chunk_key in self.chunks if chunk_key not in chunk_keys]:
+            self.evict(chunk_key, self.chunks.pop(chunk_key))
+
+    def evict(self, chunk_key: tuple[int, int], chunk: dict) -> None:
+        self.evictions += 1
+        if self.on_evict is not None:
+            self.on_evict(chunk_key, chunk)
+
+    def stats(self) -> dict:
+        return {"resident": len(self.chunks), "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
@@ -0,0 +1,154 @@
+import os
+import struct
+import threading
+
+
+class ChunkJournal:
+    """
+    What happened to chunks since they were generated, so they can be thrown away and rebuilt the same way.
+    coins: {chunk_key: set of (tile_x, tile_y)} of collected coins
+    tiles: {chunk_key: {(tile_x, tile_y): tile_id}} of changed tiles
+    fireflies: {chunk_key: [(x, y, vel_x, vel_y), ...]} last known state of the fireflies
+
+    Everything is kept in memory and appended to file_name as binary records, in batches of batch_size.
+    Once compact_after records have been appended, the file is rewritten in a background thread
+    with one record per fact that is still true. Without a file_name nothing is written.
+    """
+    COIN, TILE, FIREFLIES = range(3)
+    RECORD = struct.Struct("<Bii")
+    CELL = struct.Struct("<BBB")
+    COUNT = struct.Struct("<H")
+    FIREFLY = struct.Struct("<ffff")
+
+    def __init__(self, file_name: str | None = None, batch_size: int = 64, compact_after: int = 4096):
+        self.file_name = file_name
+        self.batch_size = batch_size
+        self.compact_after = compact_after
+        self.coins = {}
+        self.tiles = {}
+        self.fireflies = {}
+        self.pending = []
+        self.appended = 0
+        # chunks are built on worker threads while the main thread records
+        self.lock = threading.RLock()
+        self.compaction = None
+        if file_name is not None and os.path.exists(file_name):
+            with open(file_name, "rb") as file:
+                self.replay(file.read())
+
+    # Recording ------------------------------------------------------------------------------------
+
+    def collect_coin(self, chunk_key: tuple[int, int], tile: tuple[int, int]) -> None:
+        with self.lock:
+            self.coins.setdefault(chunk_key, set()).add(tile)
+            self.append(self.RECORD.pack(self.COIN, *chunk_key) + self.CELL.pack(*tile, 0))
+
+    def set_tile(self, chunk_key: tuple[int, int], tile: tuple[int, int], tile_id: int) -> None:
+        with self.lock:
+            self.tiles.setdefault(chunk_key, {})[tile] = tile_id
+            self.append(self.RECORD.pack(self.TILE, *chunk_key) + self.CELL.pack(*tile, tile_id))
+
+    def set_fireflies(self, chunk_key: tuple[int, int], fireflies: list[tuple]) -> None:
+        with self.lock:
+            self.fireflies[chunk_key] = fireflies
+            self.append(self.fireflies_record(chunk_key, fireflies))
+
+    def fireflies_record(self, chunk_key: tuple[int, int], fireflies: list[tuple]) -> bytes:
+        return (self.RECORD.pack(self.FIREFLIES, *chunk_key) + self.COUNT.pack(len(fireflies))
+                + b"".join(self.FIREFLY.pack(*firefly) for firefly in fireflies))
+
+    def append(self, record: bytes) -> None:
+        self.pending.append(record)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    # Reading --------------------------------------------------------------------------------------
+
+    def chunk_state(self, chunk_key: tuple[int, int]) -> tuple:
+        """
+        Collected coins, changed tiles and fireflies of one chunk, None for the fireflies if never saved.
+        """
+        with self.lock:
+            return (frozenset(self.coins.get(chunk_key, ())),
+                    dict(self.tiles.get(chunk_key, {})),
+                    self.fireflies.get(chunk_key))
+
+    def replay(self, data: bytes) -> None:
+        """
+        Applies records to the in memory state, a record cut off at the end is ignored.
+        """
+        i = 0
+        while i + self.RECORD.size <= len(data):
+            kind, chunk_x, chunk_y = self.RECORD.unpack_from(data, i)
+            chunk_key = (chunk_x, chunk_y)
+            i += self.RECORD.size
+            if kind == self.FIREFLIES:
+                if i + self.COUNT.size > len(data):
+                    return
+                n, = self.COUNT.unpack_from(data, i)
+                i += self.COUNT.size
+                if i + n * self.FIREFLY.size > len(data):
+                    return
+                self.fireflies[chunk_key] = [self.FIREFLY.unpack_from(data, i + j * self.FIREFLY.size)
+                                             for j in range(n)]
+                i += n * self.FIREFLY.size
+                continue
+            if i + self.CELL.size > len(data):
+                return
+            tile_x, tile_y, tile_id = self.CELL.unpack_from(data, i)
+            i += self.CELL.size
+            if kind == self.COIN:
+                self.coins.setdefault(chunk_key, set()).add((tile_x, tile_y))
+            elif kind == self.TILE:
+                self.tiles.setdefault(chunk_key, {})[(tile_x, tile_y)] = tile_id
+            else:
+                raise ValueError(f"unknown journal record {kind} in {self.file_name}")
+
+    # Disk -----------------------------------------------------------------------------------------
+
+    def flush(self) -> None:
+        with self.lock:
+            if not self.pending:
+                return
+            if self.file_name is not None:
+                with open(self.file_name, "ab") as file:
+                    file.write(b"".join(self.pending))
+            self.appended += len(self.pending)
+            self.pending = []
+            if self.appended >= self.compact_after and self.compaction is None and self.file_name is not None:
+                self.appended = 0
+                self.compaction = threading.Thread(target=self.compact, daemon=True)
+                self.compaction.start()
+
+    def snapshot(self) -> bytes:
+        with self.lock:
+            records = [self.RECORD.pack(self.COIN, *chunk_key) + self.CELL.pack(*tile, 0)
+                       for chunk_key, tiles in self.coins.items() for tile in tiles]
+            records += [self.RECORD.pack(self.TILE, *chunk_key) + self.CELL.pack(*tile, tile_id)
+                        for chunk_key, tiles in self.tiles.items() for tile, tile_id in tiles.items()]
+            records += [self.fireflies_record(chunk_key, fireflies) for chunk_key, fireflies in self.fireflies.items()]
+            return b"".join(records)
+
+    def compact(self) -> None:
+        """
+        Rewrites the file from the in memory state. Runs in the background, batches flushed meanwhile
+        are copied over from the old file before it gets replaced.
+        """
+        with self.lock:
+            self.flush()
+            data = self.snapshot()
+            old_size = os.path.getsize(self.file_name)
+        temp_file_name = self.file_name + ".compacting"
+        with open(temp_file_name, "wb") as file:
+            file.write(data)
+        with self.lock:
+            with open(self.file_name, "rb") as old_file, open(temp_file_name, "ab") as file:
+                old_file.seek(old_size)
+                file.write(old_file.read())
+            os.replace(temp_file_name, self.file_name)
+            self.compaction = None
+
+    def close(self) -> None:
+        self.flush()
+        if (compaction := self.compaction) is not None:
+            compaction.join()
@@ -0,0 +1,105 @@
+import struct
+import sys
+
+import numpy as np
+
+from global_settings import CHUNK_SIZE
+
+# tile id is the index of the char in the old txt maps
+TILE_CHARS = "ADGC"
+TILE_IDS = {char: tile_id for tile_id, char in enumerate(TILE_CHARS)}
+# tile id -> txt map char code, for whole arrays of tiles
+CHAR_CODES = np.frombuffer(TILE_CHARS.encode("ascii"), np.uint8)
+AIR = TILE_IDS["A"]
+
+
+class ChunkMap:
+    """
+    Level map as a uint8 tile id grid, stored chunk major so one chunk is one contiguous block.
+    tiles: array of shape (width_chunks, height_chunks, CHUNK_SIZE, CHUNK_SIZE),
+           indexed [chunk_x, chunk_y, tile_y, tile_x]
+
+    File layout:
+    header: magic, version, chunk size, width in chunks, height in chunks
+    body: the tiles array as is, chunk columns one after another
+
+    Files are memory-mapped copy-on-write, so only the chunks that get read are paged in
+    and set_tile never writes back to disk.
+    """
+    MAGIC = b"PGCM"
+    VERSION = 1
+    HEADER = struct.Struct("<4sHHII")
+
+    def __init__(self, tiles: np.ndarray):
+        self.tiles = tiles
+        self.width_chunks, self.height_chunks = tiles.shape[:2]
+        self.width = self.width_chunks * CHUNK_SIZE
+        self.height = self.height_chunks * CHUNK_SIZE
+
+    @classmethod
+    def from_file(cls, file_name: str) -> "ChunkMap":
+        with open(file_name, "rb") as file:
+            magic, version, chunk_size, width_chunks, height_chunks = cls.HEADER.unpack(file.read(cls.HEADER.size))
+        if magic != cls.MAGIC or version != cls.VERSION:
+            raise ValueError(f"{file_name} is not a version {cls.VERSION} chunk map")
+        if chunk_size != CHUNK_SIZE:
+            raise ValueError(f"{file_name} has chunk size {chunk_size}, expected {CHUNK_SIZE}")
+        tiles = np.memmap(file_name, np.uint8, "c", cls.HEADER.size,
+                          (width_chunks, height_chunks, CHUNK_SIZE, CHUNK_SIZE))
+        return cls(tiles)
+
+    @classmethod
+    def from_grid(cls, grid: np.ndarray) -> "ChunkMap":
+        """
+        grid: tile ids indexed [y, x], gets padded with air to whole chunks
+        """
+        height_chunks = -(-grid.shape[0] // CHUNK_SIZE)
+        width_chunks = -(-grid.shape[1] // CHUNK_SIZE)
+        padded = np.full((height_chunks * CHUNK_SIZE, width_chunks * CHUNK_SIZE), AIR, np.uint8)
+        padded[:grid.shape[0], :grid.shape[1]] = grid
+        tiles = padded.reshape(height_chunks, CHUNK_SIZE, width_chunks, CHUNK_SIZE).transpose(2, 0, 1, 3)
+        return cls(np.ascontiguousarray(tiles))
+
+    @classmethod
+    def from_txt(cls, file_name: str) -> "ChunkMap":
+        with open(file_name) as file:
+            lines = file.read().splitlines()
+        lookup = np.full(256, AIR, np.uint8)
+        for char, tile_id in TILE_IDS.items():
+            lookup[ord(char)] = tile_id
+        grid = np.full((len(lines), max(len(line) for line in lines)), AIR, np.uint8)
+        for y, line in enumerate(lines):
+            grid[y, :len(line)] = lookup[np.frombuffer(line.encode("ascii"), np.uint8)]
+        return cls.from_grid(grid)
+
+    def save(self, file_name: str) -> None:
+        with open(file_name, "wb") as file:
+            file.write(self.HEADER.pack(self.MAGIC, self.VERSION, CHUNK_SIZE, self.width_chunks, self.height_chunks))
+            file.write(np.ascontiguousarray(self.tiles).tobytes())
+
+    def chunk(self, chunk_key: tuple[int, int]) -> np.ndarray | None:
+        """
+        View of the tile ids of one chunk indexed [tile_y, tile_x], None outside the map.
+        """
+        if 0 <= chunk_key[0] < self.width_chunks and 0 <= chunk_key[1] < self.height_chunks:
+            return self.tiles[chunk_key]
+        return None
+
+    def tile(self, x: int, y: int) -> int:
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return int(self.tiles[x // CHUNK_SIZE, y // CHUNK_SIZE, y % CHUNK_SIZE, x % CHUNK_SIZE])
+        return AIR
+
+    def set_tile(self, x: int, y: int, tile_id: int) -> None:
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            raise IndexError(f"tile {(x, y)} is outside the map")
+        self.tiles[x // CHUNK_SIZE, y // CHUNK_SIZE, y % CHUNK_SIZE, x % CHUNK_SIZE] = tile_id
+
+
+def txt_to_chunk_map(txt_file_name: str, chunk_map_file_name: str) -> None:
+    ChunkMap.from_txt(txt_file_name).save(chunk_map_file_name)
+
+
+if __name__ == "__main__":
+    # python chunk_map.py level_map_2.txt level_map_2.lvl
+    txt_to_chunk_map(sys.argv[1], sys.argv[2])
@@ -0,0 +1,89 @@
+import itertools
+import queue
+import threading
+
+
+class ChunkPipeline:
+    """
+    Builds chunks on worker threads ahead of need.
+    build: function chunk_key -> chunk, runs on the workers so it must not change shared state
+    Lower priority numbers are built first, finished chunks are picked up on the main thread with collect().
+    Chunks invalidated while they are being built are built again before collect() hands them out.
+    Requesting a pending chunk again with a lower priority number moves it forward in the queue.
+    """
+    def __init__(self, build, n_workers: int = 2):
+        self.build = build
+        self.requests = queue.PriorityQueue()
+        self.finished = queue.Queue()
+        # written on the main thread, {chunk_key: (priority, sequence of the request that counts)}
+        # the workers read it to skip requests that were moved forward
+        self.pending = {}
+        self.stale = set()
+        self.sequence = itertools.count()
+        self.workers = tuple(threading.Thread(target=self.work, daemon=True) for _ in range(n_workers))
+        for worker in self.workers:
+            worker.start()
+
+    def __contains__(self, chunk_key: tuple[int, int]) -> bool:
+        return chunk_key in self.pending
+
+    def request(self, chunk_key: tuple[int, int], priority: float) -> None:
+        if chunk_key in self.pending and self.pending[chunk_key][0] <= priority:
+            return
+        self.put(chunk_key, priority)
+
+    def put(self, chunk_key: tuple[int, int], priority: float) -> None:
+        sequence = next(self.sequence)
+        self.pending[chunk_key] = (priority, sequence)
+        self.requests.put((priority, sequence, chunk_key))
+
+    def invalidate(self, chunk_key: tuple[int, int]) -> None:
+        if chunk_key in self.pending:
+            self.stale.add(chunk_key)
+
+    def work(self) -> None:
+        while True:
+            _, sequence, chunk_key = self.requests.get()
+            if chunk_key is None:
+                return
+            if self.pending.get(chunk_key, (None, None))[1] != sequence:
+                continue
+            try:
+                chunk = self.build(chunk_key)
+            except Exception as error:
+                # handed over and raised on the main thread
+                chunk = error
+            self.finished.put((chunk_key, sequence, chunk))
+
+    def collect(self) -> list[tuple[tuple[int, int], dict]]:
+        ready = []
+        while True:
+            try:
+                chunk_key, sequence, chunk = self.finished.get_nowait()
+            except queue.Empty:
+                return ready
+            # a build that started before its chunk was moved forward, the newer request is handed out instead
+            if self.pending.get(chunk_key, (None, None))[1] != sequence:
+                continue
+            if chunk_key in self.stale:
+                self.stale.discard(chunk_key)
+                self.put(chunk_key, self.pending[chunk_key][0])
+                continue
+            del self.pending[chunk_key]
+            if isinstance(chunk, Exception):
+                raise chunk
+            ready.append((chunk_key, chunk))
+
+    def stop(self) -> None:
+        """
+        Drops the requests that haven't been started and waits for the workers to finish their current build.
+        """
+        while True:
+            try:
+                self.requests.get_nowait()
+            except queue.Empty:
+                break
+        for _ in self.workers:
+            self.requests.put((float("inf"), next(self.sequence), None))
+        for worker in self.workers:
+            worker.join()
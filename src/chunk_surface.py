@@ -0,0 +1,55 @@
+import pygame
+
+from global_settings import CHUNK_RES, TILE_SIZE
+from parallax import COLORKEY
+from render_backend import changed
+
+
+class ChunkSurface:
+    """
+    All static tiles of one chunk baked into a single CHUNK_RES x CHUNK_RES surface.
+    tiles: dict of tile images, keys are tile pos inside the chunk e.g. {(3, 5): dirt_surf}
+    The surface is only rebaked on the first draw after a tile changed.
+    """
+    # where there is no tile, a color no tile texture uses, black ones would get holes
+    COLORKEY = COLORKEY
+
+    def __init__(self, chunk_key: tuple[int, int]):
+        self.rect = pygame.Rect(chunk_key[0] * CHUNK_RES, chunk_key[1] * CHUNK_RES, CHUNK_RES, CHUNK_RES)
+        self.tiles = {}
+        self.image = pygame.Surface((CHUNK_RES, CHUNK_RES))
+        self.image.set_colorkey(self.COLORKEY, pygame.RLEACCEL)
+        self.dirty = True
+
+    def __contains__(self, tile: tuple[int, int]) -> bool:
+        return tile in self.tiles
+
+    def __len__(self) -> int:
+        return len(self.tiles)
+
+    def set_tile(self, tile: tuple[int, int], image: pygame.Surface | None) -> None:
+        if image is None:
+            if self.tiles.pop(tile, None) is not None:
+                self.dirty = True
+        elif self.tiles.get(tile) is not image:
+            self.tiles[tile] = image
+            self.dirty = True
+
+    def bake(self) -> None:
+        self.image.fill(self.COLORKEY)
+        self.image.blits(tuple((image, (tile[0] * TILE_SIZE, tile[1] * TILE_SIZE))
+                               for tile, image in self.tiles.items()), False)
+        changed(self.image)
+        self.dirty = False
+
+    def update(self) -> None:
+        pass
+
+    def draw(self, screen: pygame.Surface, offset: tuple[int, int]) -> int:
+        """
+        Returns the number of tiles drawn, all of them in one blit.
+        """
+        if self.dirty:
+            self.bake()
+        screen.blit(self.image, (self.rect.x - offset[0], self.rect.y - offset[1]))
+        return len(self.tiles)
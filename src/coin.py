@@ -1,22 +1,32 @@
 from functools import cached_property
-from global_settings import TILE_SIZE
+import math
+from assets import assets
+from global_settings import SCREEN_HEIGHT, SCREEN_WIDTH, TILE_SIZE
+import numpy as np
 import pygame
 from pygame import Vector2
 
 
-class Coin(pygame.sprite.Sprite):
-    def __init__(self, pos: Vector2, screen_pos_ref: list[float, float]):
-        super().__init__()
-        self.pos = pos + Vector2(TILE_SIZE/2, TILE_SIZE/2)
-        self.screen_pos_ref = screen_pos_ref
-        self.rotation_counter = 0
-        self.bounce_counter = 0
-        self.animation_state = 0
+class AnimationClock:
+    """
+    One tick per level update, everything animated from it stays in sync, even while it isn't updated.
+    """
+    def __init__(self):
+        self.tick = 0
 
+
+class CoinBatch:
+    """
+    All coins of one chunk, animated from the shared clock instead of per coin counters.
+    pos: centers of the coins without bounce, one row per coin
+    phase: per coin offset in ticks
+    tiles: map tile of every coin, how the chunk journal tells them apart
+    frames and offsets are recomputed once per update for the whole batch.
+    """
     FRAMES_PER_ANIMATION_STATE = 15
-    N_ANIMATION_STATES = 8
     FRAMES_PER_ROTATION = 120
     FRAMES_PER_BOUNCE = 150
+    # frames of the rotation on the coin sheet
     RECTS = ((0, 0, 64, 64),
              (68, 0, 56, 64),
              (128, 0, 48, 64),
@@ -25,34 +35,84 @@ class Coin(pygame.sprite.Sprite):
              (0, 68, 36, 64),
              (40, 68, 48, 64),
              (92, 68, 56, 64))
+    # y offset after each tick of a bounce, every tick moves a coin by (tick - (FRAMES_PER_BOUNCE - 1) / 2) / 44
+    BOB_OFFSETS = np.cumsum(np.r_[0, np.arange(1, FRAMES_PER_BOUNCE) - (FRAMES_PER_BOUNCE - 1) / 2] / 44)
+    HALF_SIZES = np.array([(rect[2] / 2, rect[3] / 2) for rect in RECTS])
+
+    def __init__(self, clock: AnimationClock):
+        self.clock = clock
+        self.pos = np.zeros((0, 2))
+        self.phase = np.zeros(0, np.int64)
+        self.tiles = np.zeros((0, 2), np.int64)
+        self.frames = np.zeros(0, np.int64)
+        self.offsets = np.zeros(0)
+
+    def __len__(self) -> int:
+        return len(self.pos)
+
+    def add(self, pos: Vector2, phase: int = 0) -> None:
+        self.pos = np.vstack((self.pos, (pos.x + TILE_SIZE/2, pos.y + TILE_SIZE/2)))
+        self.phase = np.append(self.phase, phase)
+        self.tiles = np.vstack((self.tiles, (int(pos.x) // TILE_SIZE, int(pos.y) // TILE_SIZE)))
+        self.update()
+
+    def update(self) -> None:
+        ticks = self.clock.tick + self.phase
+        self.frames = ticks % self.FRAMES_PER_ROTATION // self.FRAMES_PER_ANIMATION_STATE
+        self.offsets = self.BOB_OFFSETS[ticks % self.FRAMES_PER_BOUNCE]
 
-    @property
-    def rect(self):
-        return self.image.get_rect(center=(self.pos.x - self.screen_pos_ref[0],
-                                           self.pos.y - self.screen_pos_ref[1]))
-
-    @property
-    def image(self) -> pygame.Surface:
-        return self.all_images[self.animation_state]
-
-    def update(self):
-        # pos
-        self.bounce_counter += 1
-        if self.bounce_counter >= self.FRAMES_PER_BOUNCE:
-            self.bounce_counter -= self.FRAMES_PER_BOUNCE
-        self.pos.y += (self.bounce_counter - ((self.FRAMES_PER_BOUNCE - 1) / 2)) / 44
-        # animation
-        self.rotation_counter += 1
-        if self.rotation_counter >= self.FRAMES_PER_ROTATION:
-            self.rotation_counter -= self.FRAMES_PER_ROTATION
-        self.animation_state = self.rotation_counter // self.FRAMES_PER_ANIMATION_STATE
-
-    def draw(self, screen: pygame.Surface):
-        screen.blit(self.image, self.rect)
+    def centers(self) -> np.ndarray:
+        return self.pos + np.stack((np.zeros(len(self.pos)), self.offsets), axis=1)
+
+    def hits(self, world_rect: pygame.Rect) -> np.ndarray:
+        """
+        Indices of the coins overlapping world_rect.
+        """
+        centers = self.centers()
+        half_sizes = self.HALF_SIZES[self.frames]
+        return np.flatnonzero((centers[:, 0] + half_sizes[:, 0] > world_rect.left)
+                              & (centers[:, 0] - half_sizes[:, 0] < world_rect.right)
+                              & (centers[:, 1] + half_sizes[:, 1] > world_rect.top)
+                              & (centers[:, 1] - half_sizes[:, 1] < world_rect.bottom))
+
+    def remove(self, indices: np.ndarray) -> None:
+        self.pos = np.delete(self.pos, indices, axis=0)
+        self.phase = np.delete(self.phase, indices)
+        self.tiles = np.delete(self.tiles, indices, axis=0)
+        self.update()
+
+    def bounds(self) -> list[tuple[tuple[int, int], pygame.Rect]]:
+        """
+        Map tile of every coin and a world rect it stays inside of, in every frame and at every point of its bounce.
+        """
+        half_width, half_height = self.HALF_SIZES.max(axis=0)
+        lefts = np.floor(self.pos[:, 0] - half_width).tolist()
+        tops = np.floor(self.pos[:, 1] + self.BOB_OFFSETS.min() - half_height).tolist()
+        width = int(2 * half_width) + 1
+        height = math.ceil(self.BOB_OFFSETS.max() - self.BOB_OFFSETS.min() + 2 * half_height) + 1
+        return [(tuple(tile), pygame.Rect(left, top, width, height))
+                for tile, left, top in zip(self.tiles.tolist(), lefts, tops)]
 
     @cached_property
     def all_images(self):
-        image = pygame.image.load(r"..\textures\coins 3.png").convert()
-        image.set_colorkey((0, 0, 0))
-        image = pygame.transform.scale_by(image, 4)
-        return tuple(image.subsurface(rect) for rect in self.RECTS)
+        return assets.sheet("coins 3.png", self.RECTS, (0, 0, 0))
+
+    def rects(self, offset: tuple[int, int]) -> list[pygame.Rect]:
+        tops = (self.centers() - self.HALF_SIZES[self.frames] - offset).tolist()
+        sizes = (2 * self.HALF_SIZES[self.frames]).tolist()
+        # one pixel of margin for the rounding of the blit positions
+        return [pygame.Rect(top, size).inflate(2, 2) for top, size in zip(tops, sizes)]
+
+    def draw(self, screen: pygame.Surface, offset: tuple[int, int]) -> int:
+        """
+        Only blits the coins that overlap the screen, returns how many.
+        """
+        if not len(self.pos):
+            return 0
+        tops = self.centers() - self.HALF_SIZES[self.frames] - offset
+        bottoms = tops + 2 * self.HALF_SIZES[self.frames]
+        visible = np.flatnonzero((bottoms[:, 0] > 0) & (tops[:, 0] < SCREEN_WIDTH)
+                                 & (bottoms[:, 1] > 0) & (tops[:, 1] < SCREEN_HEIGHT))
+        screen.blits(tuple((self.all_images[frame], top)
+                           for frame, top in zip(self.frames[visible].tolist(), tops[visible].tolist())), False)
+        return len(visible)
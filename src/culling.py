@@ -0,0 +1,28 @@
+class CullStats:
+    """
+    Drawn and culled elements per kind ("tiles", "coins", ...), for the last frame and for the whole run.
+    frame, total: {kind: (drawn, culled)}
+    """
+    def __init__(self):
+        self.frame = {}
+        self.total = {}
+
+    def begin_frame(self) -> None:
+        self.frame = {}
+
+    def count(self, kind: str, drawn: int, culled: int) -> None:
+        for counts in (self.frame, self.total):
+            old_drawn, old_culled = counts.get(kind, (0, 0))
+            counts[kind] = (old_drawn + drawn, old_culled + culled)
+
+    def culled_fraction(self, counts: dict | None = None) -> float:
+        """
+        Share of all elements that were culled, of the whole run by default.
+        """
+        counts = self.total if counts is None else counts
+        drawn = sum(drawn for drawn, _ in counts.values())
+        culled = sum(culled for _, culled in counts.values())
+        return culled / (drawn + culled) if drawn + culled else 0.0
+
+    def summary(self) -> dict:
+        return {kind: {"drawn": drawn, "culled": culled} for kind, (drawn, culled) in self.total.items()}
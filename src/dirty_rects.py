@@ -0,0 +1,71 @@
+import pygame
+
+
+def merge_rects(rects: list[pygame.Rect]) -> list[pygame.Rect]:
+    """
+    Unions overlapping rects until none of the returned ones overlap.
+    """
+    merged = []
+    for rect in rects:
+        rect = pygame.Rect(rect)
+        i = 0
+        while i < len(merged):
+            if rect.colliderect(merged[i]):
+                rect.union_ip(merged.pop(i))
+                i = 0
+            else:
+                i += 1
+        merged.append(rect)
+    return merged
+
+
+class DirtyRectRenderer:
+    """
+    Only redraws the parts of the screen that changed, returns them for pygame.display.update.
+    Changed parts are where the level's moving elements are this frame and where they were last frame.
+    The level is drawn once per frame, clipped to the bounding rect of the changed parts.
+    Everything gets redrawn when the screen scrolled or the level asks for it, and when the changed parts
+    cover more than max_fraction of the screen or are more than max_regions rects, where a full redraw is as cheap.
+    """
+    def __init__(self,
+                 screen: pygame.Surface,
+                 background_color: tuple[int, int, int] = (0, 0, 15),
+                 max_regions: int = 32,
+                 max_fraction: float = 0.5):
+        self.screen = screen
+        self.background_color = background_color
+        self.max_regions = max_regions
+        self.max_fraction = max_fraction
+        self.last_offset = None
+        self.last_rects = []
+
+    def full_redraw(self, level) -> list[pygame.Rect]:
+        if not level.draws_background:
+            self.screen.fill(self.background_color)
+        level.draw(self.screen)
+        return [self.screen.get_rect()]
+
+    def render(self, level) -> list[pygame.Rect]:
+        offset = level.camera.offset
+        rects = level.dirty_rects()
+        screen_rect = self.screen.get_rect()
+        changed = [rect.clip(screen_rect) for rect in self.last_rects + rects]
+        changed = [rect for rect in changed if rect.w and rect.h]
+        bounds = changed[0].unionall(changed[1:]) if changed else None
+        if offset != self.last_offset or level.full_redraw \
+                or (bounds is not None and bounds.w * bounds.h > self.max_fraction * screen_rect.w * screen_rect.h):
+            level.full_redraw = False
+            update_rects = self.full_redraw(level)
+        elif bounds is None:
+            update_rects = []
+        elif len(update_rects := merge_rects(changed)) > self.max_regions:
+            update_rects = self.full_redraw(level)
+        else:
+            self.screen.set_clip(bounds)
+            if not level.draws_background:
+                self.screen.fill(self.background_color, bounds)
+            level.draw(self.screen)
+            self.screen.set_clip(None)
+        self.last_offset = offset
+        self.last_rects = rects
+        return update_rects
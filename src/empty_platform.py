@@ -1,60 +1,44 @@
+import time
+start = time.perf_counter()
 
 import pygame
-from pygame import Vector2
 
+from dirty_rects import DirtyRectRenderer
+from game_loop import GameLoop
 from global_settings import *
 import level_2
-from text_sprite import TextSprite
+from profiler import StartupTimer
+from render_backend import create_backend
+
+startup = StartupTimer(start)
+startup.record("imports", time.perf_counter() - start)
 
 # Init ########################################################################
-pygame.init()
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("IS THAT AMOGUS???")
-clock = pygame.time.Clock()
-start_time = 0
-in_menu = False
+with startup.phase("display"):
+    pygame.init()
+    backend = create_backend(RENDER_BACKEND, (SCREEN_WIDTH, SCREEN_HEIGHT), "IS THAT AMOGUS???", RENDER_DRIVER)
+    screen = backend.screen
 
 # Groups #########################################################################
-level2 = level_2.Level()
-level2.load_map_from_txt()
-
-# Timer #########################################################################
-timer_2s = pygame.USEREVENT + 1
-pygame.time.set_timer(timer_2s, 2000)
+with startup.phase("map"):
+    level2 = level_2.Level()
+    if WORLD_SEED is None:
+        level2.load_map()
+    else:
+        level2.load_generated(WORLD_SEED)
+    if SAVE_CHUNK_STATE:
+        level2.open_journal(level2.file_name + ".journal" if WORLD_SEED is None else f"world_{WORLD_SEED}.journal")
+with startup.phase("assets"):
+    level2.preload_assets()
+dirty_rect_renderer = DirtyRectRenderer(screen, (0, 0, 15)) if DIRTY_RECT_RENDERING and backend.partial_updates else None
 
 # Loop ###########################################################################
-run = True
-while run:
-    # user inputs
-    mx, my = pygame.mouse.get_pos()
-
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            run = False
-        if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_ESCAPE:
-                in_menu = not in_menu
-            if event.key == pygame.K_SPACE:
-                level2.jump()
-        if event.type == pygame.MOUSEBUTTONDOWN:
-            pass
-        if event.type == pygame.MOUSEBUTTONUP:
-            pass
-        if event.type == timer_2s:
-            pass
-
-    # static blits #########################################################################
-    screen.fill((0, 0, 15))
-
-    # moving blits ########################################################################
-    level2.update()
-    level2.draw(screen)
-
-    # test ########################################################################
-
-    # end ########################################################################
-    pygame.display.update()
-    # print(clock.get_fps())
-    clock.tick(FPS)
+game_loop = GameLoop(level2, screen, FPS, (0, 0, 15), dirty_rect_renderer, backend.present)
+with startup.phase("first frame"):
+    game_loop.frame()
+if STARTUP_REPORT:
+    print(startup.report())
+game_loop.run()
+level2.close()
 
 pygame.quit()
@@ -0,0 +1,207 @@
+import json
+import random
+import time
+
+import numpy as np
+import pygame
+
+from global_settings import FPS
+from physics import FixedTimestep
+from profiler import profiler
+
+
+class KeyState:
+    """
+    Stands in for pygame.key.get_pressed() when replaying input.
+    """
+    def __init__(self, held: frozenset):
+        self.held = held
+
+    def __getitem__(self, key: int) -> bool:
+        return key in self.held
+
+
+class InputScript:
+    """
+    Recorded input to replay instead of the keyboard.
+    steps: list of (n_frames, held keys, keys pressed on the first of those frames)
+    """
+    def __init__(self, steps: list[tuple[int, tuple, tuple]] = ()):
+        self.steps = [(n_frames, frozenset(held), frozenset(pressed)) for n_frames, held, pressed in steps]
+
+    def __len__(self) -> int:
+        return sum(step[0] for step in self.steps)
+
+    def frames(self):
+        """
+        Yields (held keys, pressed keys) for every frame.
+        """
+        for n_frames, held, pressed in self.steps:
+            key_state = KeyState(held)
+            for i in range(n_frames):
+                yield key_state, pressed if i == 0 else frozenset()
+
+    def record(self, held, pressed) -> None:
+        held = frozenset(held)
+        pressed = frozenset(pressed)
+        if self.steps and not pressed and self.steps[-1][1] == held:
+            n_frames, _, last_pressed = self.steps[-1]
+            self.steps[-1] = (n_frames + 1, held, last_pressed)
+        else:
+            self.steps.append((1, held, pressed))
+
+    def save(self, file_name: str) -> None:
+        with open(file_name, "w") as file:
+            json.dump([(n_frames, sorted(held), sorted(pressed)) for n_frames, held, pressed in self.steps], file)
+
+    @classmethod
+    def load(cls, file_name: str) -> "InputScript":
+        with open(file_name) as file:
+            return cls(json.load(file))
+
+
+class FrameStats:
+    def __init__(self, frame_times: list[float], wall_time: float):
+        self.frame_times = np.array(frame_times) * 1000
+        self.wall_time = wall_time
+
+    def summary(self) -> dict:
+        if not len(self.frame_times):
+            return {"frames": 0}
+        p50, p95, p99 = np.percentile(self.frame_times, (50, 95, 99)).tolist()
+        return {"frames": len(self.frame_times),
+                "p50 ms": round(p50, 3),
+                "p95 ms": round(p95, 3),
+                "p99 ms": round(p99, 3),
+                "max ms": round(float(self.frame_times.max()), 3),
+                "fps": round(len(self.frame_times) / self.wall_time, 1)}
+
+
+class GameLoop:
+    """
+    Runs a level either live from the keyboard or from an InputScript.
+    throttle: limit to fps like the game does, benchmarks run unthrottled
+    Live runs simulate the real time that passed, scripted ones exactly one step per frame so they replay the same.
+    seed: seeds random and np.random before the first frame, for reproducible runs
+    record: an InputScript that live input gets appended to
+    before_frame: called with the frame number before every frame, for scripted scenarios
+    Runs longer than their input script replay no keys after the script ran out.
+    present: shows the drawn frame, with the dirty rects if only those changed, see render_backend
+    """
+    KEYS = (pygame.K_a, pygame.K_d, pygame.K_s, pygame.K_SPACE)
+    NO_KEYS = KeyState(frozenset())
+
+    def __init__(self,
+                 level,
+                 screen: pygame.Surface,
+                 fps: int = FPS,
+                 background_color: tuple[int, int, int] = (0, 0, 15),
+                 dirty_rect_renderer=None,
+                 present=None):
+        self.level = level
+        self.screen = screen
+        self.fps = fps
+        self.background_color = background_color
+        self.dirty_rect_renderer = dirty_rect_renderer
+        self.present = pygame.display.update if present is None else present
+        self.clock = pygame.time.Clock()
+        self.timestep = FixedTimestep(fps)
+        self.in_menu = False
+        self.running = False
+
+    def handle_events(self) -> set:
+        pressed = set()
+        for event in pygame.event.get():
+            # the texture backend has a second, hidden window, so closing its window doesn't quit by itself
+            if event.type in (pygame.QUIT, pygame.WINDOWCLOSE):
+                self.running = False
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    self.in_menu = not self.in_menu
+                if event.key == pygame.K_F3:
+                    profiler.enabled = profiler.overlay = not profiler.overlay
+                    # the dirty rect renderer doesn't know about the overlay, it has to draw over or clear it
+                    self.level.full_redraw = True
+                if event.key == pygame.K_F4:
+                    self.export_profile()
+                pressed.add(event.key)
+        return pressed
+
+    def export_profile(self, base_name: str | None = None) -> None:
+        """
+        Writes the frames the profiler kept to base_name.csv and a chrome trace base_name.json,
+        so a hitch can be looked at right after it happened. Frames are only kept while the profiler is on (F3).
+        """
+        if not profiler.frames:
+            print("no profiled frames to export, turn the profiler on with F3")
+            return
+        if base_name is None:
+            base_name = time.strftime("profile_%Y%m%d_%H%M%S")
+        profiler.export_csv(base_name + ".csv")
+        profiler.export_chrome_trace(base_name + ".json")
+        print(f"{len(profiler.frames)} frames written to {base_name}.csv and {base_name}.json")
+
+    def frame(self, held=None, pressed=(), frame_time: float | None = None) -> None:
+        """
+        held: key state for the level, None reads the keyboard
+        frame_time: seconds to simulate, None is exactly one step
+        """
+        profiler.begin_frame()
+        if pygame.K_SPACE in pressed:
+            self.level.jump()
+        self.level.update_chunks()
+        for _ in range(self.timestep.advance(self.timestep.dt if frame_time is None else frame_time)):
+            self.level.step(held)
+        with self.level.interpolated(self.timestep.alpha):
+            if self.dirty_rect_renderer is not None:
+                with profiler.section("draw"):
+                    update_rects = self.dirty_rect_renderer.render(self.level)
+                    if (overlay_rect := profiler.draw_overlay(self.screen)) is not None:
+                        update_rects.append(overlay_rect)
+                with profiler.section("display flip"):
+                    self.present(update_rects)
+            else:
+                with profiler.section("draw"):
+                    if not self.level.draws_background:
+                        self.screen.fill(self.background_color)
+                    self.level.draw(self.screen)
+                    profiler.draw_overlay(self.screen)
+                with profiler.section("display flip"):
+                    self.present()
+        profiler.end_frame()
+
+    def run(self,
+            n_frames: int | None = None,
+            input_script: InputScript | None = None,
+            throttle: bool = True,
+            seed: int | None = None,
+            record: InputScript | None = None,
+            before_frame=None) -> FrameStats:
+        if seed is not None:
+            random.seed(seed)
+            np.random.seed(seed)
+        scripted_frames = input_script.frames() if input_script is not None else None
+        if n_frames is None and input_script is not None:
+            n_frames = len(input_script)
+        frame_times = []
+        self.running = True
+        start = time.perf_counter()
+        last_frame_start = start - self.timestep.dt
+        while self.running and (n_frames is None or len(frame_times) < n_frames):
+            frame_start = time.perf_counter()
+            if before_frame is not None:
+                before_frame(len(frame_times))
+            pressed = self.handle_events()
+            if scripted_frames is not None:
+                held, pressed = next(scripted_frames, (self.NO_KEYS, frozenset()))
+            else:
+                held = None
+                if record is not None:
+                    key_state = pygame.key.get_pressed()
+                    record.record((key for key in self.KEYS if key_state[key]), pressed & set(self.KEYS))
+            self.frame(held, pressed, None if scripted_frames is not None else frame_start - last_frame_start)
+            last_frame_start = frame_start
+            frame_times.append(time.perf_counter() - frame_start)
+            if throttle:
+                self.clock.tick(self.fps)
+        return FrameStats(frame_times, time.perf_counter() - start)
@@ -2,6 +2,28 @@
 SCREEN_WIDTH = 1280
 SCREEN_HEIGHT = 720
 FPS = 60
+# only redraw and update the changed parts of the screen, for software rendering
+DIRTY_RECT_RENDERING = False
+# "surface" blits in software, "texture" draws textures with an SDL renderer, see render_backend.py
+RENDER_BACKEND = "surface"
+# SDL render driver of the texture backend e.g. "opengl" or "software", None picks the first one that works
+RENDER_DRIVER = None
+
+# for dark levels like caves: lights go into a lightmap with 1/LIGHT_SCALE of the screen resolution,
+# multiplied over the scene. Costs about as much as drawing the rest, Level(lighting=True) turns it on per level
+LIGHTING = False
+LIGHT_SCALE = 4
+# light everywhere without a light source, (255, 255, 255) is fully lit
+AMBIENT_LIGHT = (144, 144, 176)
+
+# collected coins, changed tiles and fireflies are saved to a journal file next to the map
+SAVE_CHUNK_STATE = True
+
+# prints how long each phase of starting the game took
+STARTUP_REPORT = False
+
+# None plays level_map_2.lvl, a number generates an unbounded world from that seed
+WORLD_SEED = None
 
 CHUNK_SIZE = 8
 TILE_SIZE = 64
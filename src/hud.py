@@ -0,0 +1,67 @@
+import pygame
+
+from text_sprite import render_text
+
+
+class HudText:
+    """
+    A text readout that only re-renders when its value changes.
+    template: format string the value gets put into e.g. "coins: {}"
+    """
+    def __init__(self,
+                 pos: tuple[int, int],
+                 template: str = "{}",
+                 color: tuple[int, int, int] = (127, 127, 127),
+                 font_name=None,
+                 font_size: int = 50):
+        self.pos = pos
+        self.template = template
+        self.color = color
+        self.font_name = font_name
+        self.font_size = font_size
+        self.value = None
+        self.image = None
+        self.rect = pygame.Rect(pos, (0, 0))
+        self.last_rect = self.rect
+        self.dirty = False
+
+    def set(self, value) -> None:
+        if value == self.value and self.image is not None:
+            return
+        self.value = value
+        if not self.dirty:
+            self.last_rect = self.rect
+        self.image = render_text(self.template.format(value), self.font_name, self.font_size, self.color)
+        self.rect = self.image.get_rect(center=self.pos)
+        self.dirty = True
+
+    def draw(self, screen: pygame.Surface) -> None:
+        if self.image is not None:
+            screen.blit(self.image, self.rect)
+        self.dirty = False
+
+
+class Hud:
+    """
+    Screen space elements drawn on top of the level, elements: dict of HudText keyed by name.
+    """
+    def __init__(self):
+        self.elements = {}
+
+    def add(self, name: str, element: HudText) -> HudText:
+        self.elements[name] = element
+        return element
+
+    def set(self, name: str, value) -> None:
+        self.elements[name].set(value)
+
+    def dirty_rects(self) -> list[pygame.Rect]:
+        """
+        Where the elements that changed since they were last drawn are now and were before.
+        """
+        return [rect for element in self.elements.values() if element.dirty
+                for rect in (element.last_rect, element.rect)]
+
+    def draw(self, screen: pygame.Surface) -> None:
+        for element in self.elements.values():
+            element.draw(screen)
@@ -1,5 +1,6 @@
 import math
 from collections import deque
+from contextlib import contextmanager
 from functools import cached_property
 import random
 
@@ -7,243 +8,561 @@ import numpy as np
 import pygame.sprite
 from pygame import Vector2
 
-from coin import Coin
+from assets import assets
+from camera import Camera
+from chunk_cache import ChunkCache
+from chunk_journal import ChunkJournal
+from chunk_map import ChunkMap, TILE_CHARS, TILE_IDS
+from chunk_pipeline import ChunkPipeline
+from chunk_surface import ChunkSurface
+from coin import AnimationClock, CoinBatch
+from culling import CullStats
 from global_settings import *
+from hud import Hud, HudText
+from lighting import ChunkLights, Lightmap
+from parallax import ParallaxBackground
+from particle_system import CircleParticleSystem
+from physics import sweep_aabb
 from player_sprite import PlayerSprite
-from shape_groups import CircleGroup, FireflyGroup
-from shapes import CircleParticle, FireflyParticle
-from text_sprite import TextSprite
+from profiler import profiler
+from shape_groups import FireflyGroup
+from shapes import FireflyParticle
+from spatial_hash import SpatialHash
+from terrain import ProceduralMap, TerrainGenerator
 
 
 class Level:
     """
-    pos_screen: top left coord of screen
-    pos_player: pos of player on screen
+    camera: owns the scroll, everything else is in world coords
     loaded_chunks: dict of chunks keys is chunk pos tuple e.g. {(1,2): chunk3}
+    chunk_cache: chunks just off screen, kept resident but not updated or drawn
+    journal: collected coins, changed tiles and fireflies of chunks, saved when they leave the cache
+    entered_chunks: chunks that were loaded since they were built, only their state can differ from the journal
+    chunk_pipeline: builds chunks on worker threads, prefetching in the direction the screen moves
+    placeholder_chunks: chunks scrolled onto screen that are still being built, they are empty until they arrive
+    Nothing is loaded on the first frame, or after jumping somewhere new, so those chunks are built right away.
+    entities: broadphase of the dynamic entities of the loaded chunks, coins are keyed by their map tile
 
     Scroll:
-    player moves one screen --> changes pos_player
-    change pos_screen based on pos_player offset from middle of screen
+    player moves in the world --> the camera follows it towards the middle of the screen
 
     Draw:
     Lets write these functions, so we can adapt the chunk class to those needs.
     Layers: Groups?
-    0: background, no scroll
+    0: background, no scroll, layers 0 to 3 are one ParallaxBackground drawn at layer 0
     1. parallax layer: 0.25 scroll
     2. parallax layer: 0.5 scroll
     3. parallax layer: 0.75 scroll
-    4. tiles: 1 scroll
-    10. collision: 1 scroll
-    11. shrubs?: 1 scroll
-    20. particles: 1.1 scroll
+    4. tiles: 1 scroll, all static tiles of a chunk baked into one ChunkSurface
+    10. collision: 1 scroll, drawn as part of layer 4, collided with straight from the map
+    11. shrubs?: 1 scroll, coins as one CoinBatch per chunk
+    20. particles: 1.1 scroll, one CircleParticleSystem for the whole level
+    21. fireflies: 1 scroll, one FireflyGroup per chunk
+    30. light: the lightmap multiplied over everything before, static lights baked into one ChunkLights per chunk,
+        only for levels with lighting, e.g. dark caves
 
     How to detect particle moving from one chunk to another
     """
-    def __init__(self):
-        self.file_name = "level_map_2.txt"
-        self.map = []
+    DRAW_SECTIONS = {layer: f"draw layer {layer}" for layer in range(32)}
+    # what the elements of a chunk layer are counted as in cull_stats
+    CULL_KINDS = {4: "tiles", 11: "coins", 21: "fireflies"}
+    # how far the elements of a chunk layer can reach out of their chunk, None if they roam freely
+    CULL_MARGINS = {4: 0, 11: 2 * TILE_SIZE, 21: None}
+    # every coin lights its surroundings a bit, radius and color
+    COIN_LIGHT = (96, (110, 90, 30))
+
+    def __init__(self, chunk_workers: int = 2, lighting: bool = LIGHTING):
+        self.file_name = "level_map_2.lvl"
+        self.map: ChunkMap | ProceduralMap | None = None
         self.chunks = {}
-        self.used_layers = [4, 10, 11, 20, 21]
-        self.screen_pos = [1300, 1500]
-        self.scroll_delay = (32, 24)
-        self.player_group = pygame.sprite.GroupSingle(PlayerSprite(self.screen_pos))
+        self.seed = 0
+        self.journal = ChunkJournal()
+        self.chunk_cache = ChunkCache(on_evict=self.save_chunk_state)
+        self.entered_chunks = set()
+        self.chunk_pipeline = ChunkPipeline(self.build_chunk, chunk_workers) if chunk_workers else None
+        self.placeholder_chunks = set()
+        self.entities = SpatialHash()
+        self.used_layers = [0, 4, 10, 11, 20, 21]
+        self.lightmap = Lightmap(LIGHT_SCALE, AMBIENT_LIGHT) if lighting else None
+        if self.lightmap is not None:
+            self.used_layers.append(30)
+        self.camera = Camera((1300, 1500), scroll_delay=(32, 24))
+        self.player_group = pygame.sprite.GroupSingle(PlayerSprite(self.camera.center))
+        self.previous_player_pos = Vector2(self.player_group.sprite.pos)
+        self.particles = CircleParticleSystem()
+        self.animation_clock = AnimationClock()
         self.coins = 0
+        self.hud = Hud()
+        self.hud.add("coins", HudText((200, 100), "coins: {}"))
+        self.solid_tiles = "G"
+        # for the dirty rect renderer, set whenever something changed that dirty_rects() doesn't cover
+        self.full_redraw = True
+        self.cull_stats = CullStats()
+
+    def load_map(self) -> None:
+        self.map = ChunkMap.from_file(self.file_name)
+
+    def load_map_from_txt(self, file_name: str = "level_map_2.txt") -> None:
+        self.map = ChunkMap.from_txt(file_name)
+
+    def load_generated(self, seed: int) -> None:
+        """
+        Unbounded world, chunks are generated from the seed when they get loaded.
+        """
+        self.seed = seed
+        generator = TerrainGenerator(seed)
+        self.map = ProceduralMap(generator)
+        # drop the player onto the surface
+        player = self.player_group.sprite
+        surface_y = generator.heights(int(player.pos.x) // TILE_SIZE, 1)[0] * TILE_SIZE
+        player.pos.y = surface_y - player.image.get_height()
+        self.previous_player_pos.update(player.pos)
+        self.camera.jump_to((self.camera.pos[0], player.pos.y - SCREEN_HEIGHT/2))
 
-    def load_map_from_txt(self) -> None:
-        with open(self.file_name) as file:
-            self.map = tuple(line for line in file)
+    def open_journal(self, file_name: str) -> None:
+        """
+        Continues from the chunk states saved in file_name, after the map is loaded and before any chunk is.
+        Every coin ever collected is in there, so the coin count continues too.
+        """
+        self.journal = ChunkJournal(file_name)
+        self.coins = sum(len(tiles) for tiles in self.journal.coins.values())
+        for chunk_key, tiles in self.journal.tiles.items():
+            for (tile_x, tile_y), tile_id in tiles.items():
+                self.map.set_tile(chunk_key[0]*CHUNK_SIZE + tile_x, chunk_key[1]*CHUNK_SIZE + tile_y, tile_id)
+
+    def save_chunk_state(self, chunk_key: tuple[int, int], chunk: dict) -> None:
+        # prefetched chunks that never made it on screen are just like they were built from the journal
+        if chunk_key not in self.entered_chunks:
+            return
+        self.entered_chunks.discard(chunk_key)
+        if 21 in chunk:
+            self.journal.set_fireflies(chunk_key, [(*firefly.pos, *firefly.vel)
+                                                   for firefly in chunk[21].particle_queue])
+
+    def close(self) -> None:
+        if self.chunk_pipeline is not None:
+            self.chunk_pipeline.stop()
+        for chunk_key, chunk in list(self.chunks.items()) + list(self.chunk_cache.chunks.items()):
+            self.save_chunk_state(chunk_key, chunk)
+        self.journal.close()
 
     def load_chunk(self, chunk_key: tuple[int, int]) -> None:
-        new_chunk = {}
-        tile_pos = (0, 0)
-        for tile_x in range(CHUNK_SIZE):
-            for tile_y in range(CHUNK_SIZE):
+        self.enter_chunk(chunk_key, self.build_chunk(chunk_key))
+
+    def enter_chunk(self, chunk_key: tuple[int, int], chunk: dict) -> None:
+        """
+        Makes a chunk one of the loaded ones, its entities join the broadphase.
+        """
+        self.chunks[chunk_key] = chunk
+        self.entered_chunks.add(chunk_key)
+        if 11 in chunk:
+            for tile, rect in chunk[11].bounds():
+                self.entities.insert(tile, "coin", rect)
+
+    def build_chunk(self, chunk_key: tuple[int, int]) -> dict:
+        """
+        Also runs on the chunk pipeline workers, so it only reads the level.
+        Fireflies are rolled from a per chunk seed, or restored from the journal, and collected coins stay gone.
+        """
+        new_chunk = {4: ChunkSurface(chunk_key)}
+        chunk_tiles = self.map.chunk(chunk_key)
+        if chunk_tiles is None:
+            return new_chunk
+        collected_coins, _, fireflies = self.journal.chunk_state(chunk_key)
+        firefly_random = random.Random(hash((self.seed, *chunk_key)))
+        for tile_y, row in enumerate(chunk_tiles.tolist()):
+            for tile_x, tile_id in enumerate(row):
+                char = TILE_CHARS[tile_id]
                 char_pos = (chunk_key[0]*CHUNK_SIZE+tile_x, chunk_key[1]*CHUNK_SIZE+tile_y)
-                char = self.map[char_pos[1]][char_pos[0]]
+                tile_pos = (char_pos[0]*TILE_SIZE, char_pos[1]*TILE_SIZE)
                 if char == "A":
-                    if not random.randrange(100):
+                    if fireflies is None and not firefly_random.randrange(100):
                         if 21 not in new_chunk:
-                            new_chunk[21] = FireflyGroup()
+                            new_chunk[21] = FireflyGroup(glow=self.lightmap is None)
                         new_firefly = FireflyParticle(Vector2(tile_pos))
                         new_chunk[21].add(new_firefly)
-                tile_pos = (char_pos[0]*TILE_SIZE, char_pos[1]*TILE_SIZE)
-                if char == "D":
-                    if 4 not in new_chunk:
-                        new_chunk[4] = pygame.sprite.Group()
-                    new_dirt = Tile(self.dirt_surf, tile_pos, self.screen_pos)
-                    new_chunk[4].add(new_dirt)
-                elif char == "G":
-                    if 10 not in new_chunk:
-                        new_chunk[10] = pygame.sprite.Group()
-                    new_grass = Tile(self.grass_surf, tile_pos, self.screen_pos)
-                    new_chunk[10].add(new_grass)
                 elif char == "C":
+                    if (tile_x, tile_y) in collected_coins:
+                        continue
                     if 11 not in new_chunk:
-                        new_chunk[11] = pygame.sprite.Group()
-                    new_coin = Coin(Vector2(tile_pos), self.screen_pos)
-                    new_chunk[11].add(new_coin)
+                        new_chunk[11] = CoinBatch(self.animation_clock)
+                    new_chunk[11].add(Vector2(tile_pos))
+                else:
+                    self.add_static_tile(new_chunk, (tile_x, tile_y), char)
+        if fireflies:
+            new_chunk[21] = FireflyGroup(glow=self.lightmap is None)
+            for x, y, vel_x, vel_y in fireflies:
+                new_firefly = FireflyParticle(Vector2(x, y))
+                new_firefly.vel.update(vel_x, vel_y)
+                new_chunk[21].add(new_firefly)
+        new_chunk[4].bake()
+        if self.lightmap is not None and 11 in new_chunk:
+            new_chunk[30] = ChunkLights(chunk_key, LIGHT_SCALE)
+            new_chunk[30].set_lights(self.coin_lights(new_chunk[11]))
+            new_chunk[30].bake()
+        return new_chunk
+
+    def coin_lights(self, coins: CoinBatch) -> list[tuple]:
+        radius, color = self.COIN_LIGHT
+        return [(pos, radius, color) for pos in coins.pos.tolist()]
 
-        self.chunks[chunk_key] = new_chunk
-        return
+    def add_static_tile(self, chunk: dict, tile: tuple[int, int], char: str) -> None:
+        if char in self.static_tiles:
+            chunk[4].set_tile(tile, self.static_tiles[char])
+
+    def set_tile(self, char_pos: tuple[int, int], char: str) -> None:
+        """
+        Changes one static tile of the map, only the chunk surface it is in gets rebaked.
+        A chunk that is still being built gets built again, the build might have read the map before the change.
+        """
+        self.map.set_tile(*char_pos, TILE_IDS[char])
+        chunk_key = (char_pos[0] // CHUNK_SIZE, char_pos[1] // CHUNK_SIZE)
+        self.journal.set_tile(chunk_key, (char_pos[0] % CHUNK_SIZE, char_pos[1] % CHUNK_SIZE), TILE_IDS[char])
+        if self.chunk_pipeline is not None:
+            self.chunk_pipeline.invalidate(chunk_key)
+        chunk = self.chunks.get(chunk_key, self.chunk_cache.chunks.get(chunk_key))
+        if chunk is None or chunk_key in self.placeholder_chunks:
+            return
+        self.full_redraw = True
+        tile = (char_pos[0] % CHUNK_SIZE, char_pos[1] % CHUNK_SIZE)
+        chunk[4].set_tile(tile, None)
+        self.add_static_tile(chunk, tile, char)
 
     def unload_chunk(self, chunk_key):
-        # this might need some saving mechanic
-        # for things that have been interacted with
-        self.chunks.pop(chunk_key)
-
-    def chunks_on_screen(self) -> tuple:
-        # these int() shouldn't ben necessary as screen_pos now always is an int
-        x_min = int(self.screen_pos[0])//CHUNK_RES
-        x_max = (int(self.screen_pos[0])+SCREEN_WIDTH)//CHUNK_RES + 1
-        y_min = int(self.screen_pos[1]) // CHUNK_RES
-        y_max = (int(self.screen_pos[1]) + SCREEN_HEIGHT) // CHUNK_RES + 1
+        # the chunk only moves to the cache, its state goes into the journal once the cache evicts it
+        chunk = self.chunks.pop(chunk_key)
+        if 11 in chunk:
+            for tile in chunk[11].tiles.tolist():
+                self.entities.remove(tuple(tile))
+        if chunk_key in self.placeholder_chunks:
+            self.placeholder_chunks.discard(chunk_key)
+        else:
+            self.chunk_cache.put(chunk_key, chunk)
+
+    def chunks_on_screen(self, margin: int = 0, camera_pos=None) -> tuple:
+        view = self.camera.view_rect(camera_pos)
+        # up to the last pixel column and row on screen, no extra chunk when the screen ends on a chunk border
+        x_min = view.left // CHUNK_RES - margin
+        x_max = (view.right - 1) // CHUNK_RES + 1 + margin
+        y_min = view.top // CHUNK_RES - margin
+        y_max = (view.bottom - 1) // CHUNK_RES + 1 + margin
         return tuple((x, y) for x in range(x_min, x_max) for y in range(y_min, y_max))
 
-    def player_chunk(self) -> tuple:
-        px = int(self.player_group.sprite.rect.centerx + self.screen_pos[0]) // CHUNK_RES
-        py = int(self.player_group.sprite.rect.centery + self.screen_pos[1]) // CHUNK_RES
-        return px, py
+    def chunks_ahead(self) -> tuple:
+        return self.chunks_on_screen(camera_pos=self.camera.predicted_pos())
 
-    def chunks_around_player(self) -> tuple:
-        px, py = self.player_chunk()
-        return tuple((x, y) for x in range(px-1, px+2) for y in range(py-1, py+2) if (x, y) in self.chunks)
+    def prefetch_chunks(self) -> None:
+        predicted_pos = self.camera.predicted_pos()
+        center = (predicted_pos[0] + SCREEN_WIDTH/2, predicted_pos[1] + SCREEN_HEIGHT/2)
+        for chunk_key in self.chunks_ahead():
+            if chunk_key in self.chunks or chunk_key in self.chunk_cache or chunk_key in self.chunk_pipeline:
+                continue
+            # closest to where the screen is headed first
+            priority = math.dist(center, ((chunk_key[0]+0.5)*CHUNK_RES, (chunk_key[1]+0.5)*CHUNK_RES))
+            self.chunk_pipeline.request(chunk_key, priority)
 
-    def update(self) -> None:
+    def collect_prepared_chunks(self) -> None:
+        for chunk_key, chunk in self.chunk_pipeline.collect():
+            if chunk_key in self.placeholder_chunks:
+                self.placeholder_chunks.discard(chunk_key)
+                self.enter_chunk(chunk_key, chunk)
+                self.full_redraw = True
+            elif chunk_key not in self.chunks and chunk_key not in self.chunk_cache:
+                self.chunk_cache.put(chunk_key, chunk)
+
+    def update(self, pressed_keys=None) -> None:
+        """
+        One frame with exactly one simulation step.
+        pressed_keys: key state for the player, None reads the keyboard
+        """
+        self.update_chunks()
+        self.step(pressed_keys)
+
+    def update_chunks(self) -> None:
+        """
+        Once per rendered frame.
+        """
         chunks_on_screen = self.chunks_on_screen()
         # chunk unloading
-        unload_list = []
-        for chunk_key in self.chunks:
-            if chunk_key not in chunks_on_screen:
-                unload_list.append(chunk_key)
-        for chunk_key in unload_list:
-            self.unload_chunk(chunk_key)
-
-        for chunk_key in self.chunks_on_screen():
-            # chunk loading
-            if chunk_key not in self.chunks:
-                self.load_chunk(chunk_key)
-            # updating
-            for layer in (11, 20, 21):
-                if layer in self.chunks[chunk_key]:
-                    self.chunks[chunk_key][layer].update()
+        with profiler.section("chunk unload"):
+            unload_list = []
+            for chunk_key in self.chunks:
+                if chunk_key not in chunks_on_screen:
+                    unload_list.append(chunk_key)
+            for chunk_key in unload_list:
+                self.unload_chunk(chunk_key)
+            self.chunk_cache.evict_outside(set(self.chunks_on_screen(self.chunk_cache.margin) + self.chunks_ahead()))
+        # chunk loading
+        with profiler.section("chunk load"):
+            if self.chunk_pipeline is not None:
+                self.collect_prepared_chunks()
+            # with nothing loaded yet, e.g. on the first frame, an empty screen isn't worth the wait
+            synchronous = self.chunk_pipeline is None or not self.chunks
+            for chunk_key in chunks_on_screen:
+                if chunk_key not in self.chunks:
+                    if (chunk := self.chunk_cache.take(chunk_key)) is not None:
+                        self.enter_chunk(chunk_key, chunk)
+                    elif synchronous:
+                        self.load_chunk(chunk_key)
+                    else:
+                        self.chunks[chunk_key] = {}
+                        self.placeholder_chunks.add(chunk_key)
+                        self.chunk_pipeline.request(chunk_key, -1)
+        # chunk prefetching
+        if self.chunk_pipeline is not None:
+            with profiler.section("chunk prefetch"):
+                self.prefetch_chunks()
+
+    def step(self, pressed_keys=None) -> None:
+        """
+        One fixed simulation step, see FixedTimestep.
+        pressed_keys: key state for the player, None reads the keyboard
+        """
+        self.camera.begin_step()
+        self.previous_player_pos.update(self.player_group.sprite.pos)
+        self.animation_clock.tick += 1
+        # updating
+        with profiler.section("layer update"):
+            for chunk_key in self.chunks:
+                for layer in (11, 21):
+                    if layer in self.chunks[chunk_key]:
+                        self.chunks[chunk_key][layer].update()
+            self.particles.update()
         # player update
-        self.player_group.update()
-        self.update_player_pos_scroll_and_check_collisions()
-        self.check_coin_collision()
+        with profiler.section("player physics"):
+            self.player_group.update(pressed_keys)
+        with profiler.section("collision"):
+            self.update_player_pos_scroll_and_check_collisions()
+        with profiler.section("coin check"):
+            self.check_coin_collision()
+        self.hud.set("coins", self.coins)
+        self.camera.end_step()
+
+    @contextmanager
+    def interpolated(self, alpha: float):
+        """
+        While drawing, puts the camera and the player alpha of the way from the previous to the last step.
+        """
+        if alpha >= 1:
+            yield
+            return
+        player = self.player_group.sprite
+        camera_pos = tuple(self.camera.pos)
+        player_pos = Vector2(player.pos)
+        previous_pos = self.camera.previous_pos
+        for i in (0, 1):
+            self.camera.pos[i] = previous_pos[i] + (camera_pos[i] - previous_pos[i]) * alpha
+        player.pos.update(self.previous_player_pos.lerp(player_pos, alpha))
+        try:
+            yield
+        finally:
+            self.camera.pos[:] = camera_pos
+            player.pos.update(player_pos)
+
+    @property
+    def draws_background(self) -> bool:
+        """
+        Whether layer 0 covers the whole screen, so it doesn't have to be cleared before drawing.
+        """
+        return 0 in self.used_layers
+
+    def chunk_in_view(self, chunk_key: tuple[int, int], layer: int, view: pygame.Rect) -> bool:
+        margin = self.CULL_MARGINS.get(layer)
+        if margin is None:
+            return True
+        chunk_rect = pygame.Rect(chunk_key[0]*CHUNK_RES - margin, chunk_key[1]*CHUNK_RES - margin,
+                                 CHUNK_RES + 2*margin, CHUNK_RES + 2*margin)
+        return chunk_rect.colliderect(view)
 
     def draw(self, screen: pygame.Surface) -> None:
+        """
+        Culls whole chunk layers outside the view, the layers themselves only blit the elements on screen.
+        Everything is in world coords, the camera offset is applied once per layer.
+        """
+        self.cull_stats.begin_frame()
+        view = self.camera.view_rect()
+        offset = self.camera.offset
         for layer in self.used_layers:
-            for key in self.chunks:
-                if layer not in self.chunks[key]:
+            with profiler.section(self.DRAW_SECTIONS[layer]):
+                if layer == 0:
+                    self.background.draw(screen, offset)
+                if layer == 30:
+                    self.draw_lights(screen, offset, view)
                     continue
-                if layer in (20, 21):
-                    self.chunks[key][layer].draw(screen, self.screen_pos)
-                else:
-                    self.chunks[key][layer].draw(screen)
-            if layer == 10:
-                self.player_group.draw(screen)
-        # todo fix this garbage
-        pygame.sprite.Group(TextSprite(f"coins: {self.coins}", Vector2(200, 100))).draw(screen)
+                if layer == 20:
+                    drawn = self.particles.draw(screen, offset)
+                    self.cull_stats.count("particles", drawn, len(self.particles) - drawn)
+                for key in self.chunks:
+                    if layer not in self.chunks[key]:
+                        continue
+                    element = self.chunks[key][layer]
+                    if not self.chunk_in_view(key, layer, view):
+                        self.cull_stats.count(self.CULL_KINDS[layer], 0, len(element))
+                        continue
+                    drawn = element.draw(screen, offset)
+                    self.cull_stats.count(self.CULL_KINDS[layer], drawn, len(element) - drawn)
+                if layer == 10:
+                    player = self.player_group.sprite
+                    screen.blit(player.image, (player.rect.x - offset[0], player.rect.y - offset[1]))
+        with profiler.section("draw hud"):
+            self.hud.draw(screen)
+
+    def draw_lights(self, screen: pygame.Surface, offset: tuple[int, int], view: pygame.Rect) -> None:
+        self.lightmap.begin(offset)
+        lights = []
+        for chunk in self.chunks.values():
+            if 30 in chunk and chunk[30].rect.colliderect(view):
+                chunk[30].draw(self.lightmap)
+            if 21 in chunk:
+                lights += chunk[21].lights()
+        self.lightmap.add_lights(lights)
+        self.lightmap.composite(screen, offset)
+
+    def dirty_rects(self) -> list[pygame.Rect]:
+        """
+        Screen rects of everything that might have changed since the last frame, the screen not scrolling.
+        """
+        offset = self.camera.offset
+        rects = [self.camera.to_screen(self.player_group.sprite.rect)]
+        for chunk in self.chunks.values():
+            if 11 in chunk:
+                rects += chunk[11].rects(offset)
+            if 21 in chunk:
+                rects += chunk[21].rects(offset)
+        if (particle_rect := self.particles.bounding_rect(offset)) is not None:
+            rects.append(particle_rect)
+        rects += self.hud.dirty_rects()
+        return rects
 
     def jump(self):
         self.player_group.sprite.jump()
 
     def update_player_pos_scroll_and_check_collisions(self):
+        """
+        Sweeps the player along its velocity, so no step is too long to stop at a tile.
+        Whatever it hits stops the velocity along the contact normal, the rest of the move slides along it.
+        """
         # qol
         player = self.player_group.sprite
-        # x scroll
-        x_scroll = (self.player_group.sprite.pos.x - (SCREEN_WIDTH/2) - self.screen_pos[0]) / self.scroll_delay[0]
-        self.screen_pos[0] += x_scroll
-        # x movement
-        self.player_group.sprite.pos.x += player.vel.x
-        # x collision
-        if x_collision_sprite_list := self.player_collisions_with_layer(10):
-            player.vel.x = 0
-            for sprite in x_collision_sprite_list:
-                if player.facing_east:
-                    player.pos.x = -0.5 * player.rect.width + sprite.rect.left + self.screen_pos[0]
-                else:
-                    player.pos.x = 0.5 * player.rect.width + sprite.rect.right + self.screen_pos[0]
-        # y scroll
-        y_scroll = (self.player_group.sprite.pos.y - (SCREEN_HEIGHT / 2) - self.screen_pos[1]) / self.scroll_delay[1]
-        self.screen_pos[1] += y_scroll
-        # y movement
-        self.player_group.sprite.pos.y += player.vel.y
-        # y collision
+        # scroll
+        self.camera.follow(0, player.pos.x)
+        self.camera.follow(1, player.pos.y)
+        # movement and collision
+        width, height = player.image.get_size()
+        move = (player.vel.x, player.vel.y)
         player.on_ground = False
-        if y_collision_sprite_list := self.player_collisions_with_layer(10):
-            # dust particles
+        # at most one hit per axis and one more to find out the move is free
+        for _ in range(3):
+            if move == (0, 0):
+                break
+            box = (player.pos.x - width/2, player.pos.y - height/2, width, height)
+            toi, normal, tile_rect = self.sweep_solid_tiles(box, move)
+            player.pos.x += move[0] * toi
+            player.pos.y += move[1] * toi
+            if tile_rect is None:
+                break
+            if normal[0]:
+                # x collision
+                player.vel.x = 0
+                player.pos.x = tile_rect.left - width/2 if normal[0] < 0 else tile_rect.right + width/2
+                move = (0, move[1] * (1 - toi))
+                continue
+            # y collision, dust particles
             n_particles = max(0, round(player.vel.y-2))
             if abs(player.vel.x) > 4:
                 n_particles += 1
-            # back to collisions
             player.vel.y = 0
-            for sprite in y_collision_sprite_list:
-                if player.facing_down:
-                    player.pos.y = -0.5 * player.rect.height + sprite.rect.top + self.screen_pos[1]
-                    player.stamina = 1
-                    player.on_ground = True
-                    self.add_circle_particle(player.rect.midbottom, n_particles)
-                else:
-                    player.pos.y = 0.5 * player.rect.height + sprite.rect.bottom + self.screen_pos[1]
+            if normal[1] < 0:
+                player.pos.y = tile_rect.top - height/2
+                player.stamina = 1
+                player.on_ground = True
+                self.add_circle_particle(player.rect.midbottom, n_particles)
+            else:
+                player.pos.y = tile_rect.bottom + height/2
+            move = (move[0] * (1 - toi), 0)
 
-    def player_collisions_with_layer(self, layer: int, dokill: bool = False) -> list:
-        player = self.player_group.sprite
-        collision_sprite_list = []
-        for chunk_key in self.chunks_around_player():
-            if layer in self.chunks[chunk_key]:
-                collisions = pygame.sprite.spritecollide(player, self.chunks[chunk_key][layer], dokill)
-                for collision in collisions:
-                    collision_sprite_list.append(collision)
-        return collision_sprite_list
+    def sweep_solid_tiles(self, box: tuple[float, float, float, float], move: tuple[float, float]) -> tuple:
+        """
+        Time of impact, contact normal and world rect of the first solid tile box runs into along move,
+        see sweep_aabb. One lookup of the map cells covering the whole move.
+        """
+        left, top, width, height = box
+        x_min = math.floor(min(left, left + move[0]))
+        y_min = math.floor(min(top, top + move[1]))
+        x_max = math.ceil(max(left, left + move[0]) + width)
+        y_max = math.ceil(max(top, top + move[1]) + height)
+        swept_rect = pygame.Rect(x_min, y_min, x_max - x_min, y_max - y_min)
+        return sweep_aabb(box, move, self.solid_tiles_colliding_with(swept_rect))
+
+    def solid_tiles_colliding_with(self, world_rect: pygame.Rect) -> list[pygame.Rect]:
+        """
+        Looks up the map cells world_rect overlaps, returns the world rects of the solid ones.
+        """
+        y_min = world_rect.top // TILE_SIZE
+        y_max = (world_rect.bottom - 1) // TILE_SIZE + 1
+        x_min = world_rect.left // TILE_SIZE
+        x_max = (world_rect.right - 1) // TILE_SIZE + 1
+        collision_rect_list = []
+        for y in range(y_min, y_max):
+            for x in range(x_min, x_max):
+                if TILE_CHARS[self.map.tile(x, y)] in self.solid_tiles:
+                    collision_rect_list.append(pygame.Rect(x*TILE_SIZE, y*TILE_SIZE, TILE_SIZE, TILE_SIZE))
+        return collision_rect_list
 
     def check_coin_collision(self):
-        if coin_collisions := self.player_collisions_with_layer(11, True):
-            player_chunk = self.player_chunk()
-            if 20 not in self.chunks[player_chunk]:
-                self.chunks[player_chunk][20] = CircleGroup()
+        """
+        The broadphase finds the coins that might touch the player, only their batches are checked exactly.
+        """
+        player_rect = self.player_group.sprite.rect
+        coin_collisions = []
+        near_coins = self.entities.query(player_rect, "coin")
+        for chunk_key in {(tile_x // CHUNK_SIZE, tile_y // CHUNK_SIZE) for tile_x, tile_y in near_coins}:
+            chunk = self.chunks[chunk_key]
+            if len(hits := chunk[11].hits(player_rect)):
+                coin_collisions += [tuple(center) for center in chunk[11].centers()[hits].tolist()]
+                for tile_x, tile_y in chunk[11].tiles[hits].tolist():
+                    self.entities.remove((tile_x, tile_y))
+                    self.journal.collect_coin(chunk_key, (tile_x - chunk_key[0]*CHUNK_SIZE,
+                                                          tile_y - chunk_key[1]*CHUNK_SIZE))
+                chunk[11].remove(hits)
+                if 30 in chunk:
+                    chunk[30].set_lights(self.coin_lights(chunk[11]))
+                    # the light around the coin is bigger than the coin
+                    self.full_redraw = True
+        if coin_collisions:
             n_particles = 16
-            for coin in coin_collisions:
+            for coin_pos in coin_collisions:
                 self.coins += 1
-                for i in range(n_particles):
-                    new_circle = CircleParticle(Vector2(coin.pos.x, coin.pos.y),
-                                                radius=16,
-                                                radius_decay=0.5,
-                                                color=(255, 175, 0))
-                    self.chunks[player_chunk][20].add(new_circle)
+                self.particles.emit(coin_pos, n_particles,
+                                    radius=16,
+                                    radius_decay=0.5,
+                                    color=(255, 175, 0))
 
     def add_circle_particle(self, pos: Vector2, n_particles: int = 1) -> None:
-        player_chunk = self.player_chunk()
-        if 20 not in self.chunks[player_chunk]:
-            self.chunks[player_chunk][20] = CircleGroup()
-        for i in range(n_particles):
-            ans = random.uniform(-1, 1)
-            angle = math.sqrt(ans) if ans >= 0 else -math.sqrt(-ans)
-            angle -= 1
-            angle *= 90
-            new_circle = CircleParticle(pos + Vector2(self.screen_pos), angle_range=(angle, angle))
-            self.chunks[player_chunk][20].add(new_circle)
+        ans = np.random.uniform(-1, 1, n_particles)
+        angles = (np.sign(ans) * np.sqrt(np.abs(ans)) - 1) * 90
+        self.particles.emit(pos, n_particles, angles=angles)
 
     # Textures -------------------------------------------------------------------------------------
 
-    @cached_property
-    def dirt_surf(self):
-        ans = pygame.image.load(r"../textures/dirt.png").convert()
-        return pygame.transform.scale_by(ans, 4)
+    def preload_assets(self) -> None:
+        """
+        Loads the textures of the tiles and the background now instead of on the first frame that needs them.
+        """
+        _ = self.static_tiles, self.background
 
     @cached_property
-    def grass_surf(self):
-        ans = pygame.image.load(r"../textures/grass_block_side.png").convert()
-        return pygame.transform.scale_by(ans, 4)
+    def background(self) -> ParallaxBackground:
+        return ParallaxBackground.placeholder()
 
+    @cached_property
+    def static_tiles(self) -> dict:
+        return {"D": self.dirt_surf, "G": self.grass_surf}
 
-class Tile(pygame.sprite.Sprite):
-    def __init__(self, image: pygame.Surface, pos: tuple[int, int], screen_pos_ref: list[float, float]):
-        super().__init__()
-        self.screen_pos_ref = screen_pos_ref
-        self.image = image
-        self.pos = pos
+    @cached_property
+    def dirt_surf(self):
+        return assets.texture("dirt.png")
 
-    @property
-    def rect(self):
-        return self.image.get_rect(topleft=(self.pos[0]-self.screen_pos_ref[0], self.pos[1]-self.screen_pos_ref[1]))
+    @cached_property
+    def grass_surf(self):
+        return assets.texture("grass_block_side.png")
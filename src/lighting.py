@@ -0,0 +1,106 @@
+from functools import lru_cache
+
+import numpy as np
+import pygame
+
+from global_settings import CHUNK_RES, SCREEN_WIDTH, SCREEN_HEIGHT
+from render_backend import TextureScreen
+
+
+@lru_cache(maxsize=256)
+def falloff_sprite(radius: int, color: tuple[int, int, int]) -> pygame.Surface:
+    """
+    A light of radius lightmap pixels, color in the middle falling off quadratically to black at the edge.
+    """
+    size = 2 * radius
+    distance = np.hypot(*np.meshgrid(np.arange(size) + 0.5 - radius, np.arange(size) + 0.5 - radius, indexing="ij"))
+    intensity = np.clip(1 - distance / radius, 0, 1) ** 2
+    pixels = np.rint(intensity[..., None] * np.array(color)).astype(np.uint8)
+    return pygame.surfarray.make_surface(pixels)
+
+
+class Lightmap:
+    """
+    Light of the screen at 1/scale of its resolution, multiplied over the scene once per frame.
+    Starts every frame at the ambient light, lights are added on top.
+    The lightmap pixels stay aligned to the world, so lights don't shimmer while scrolling.
+    Upscaling is bilinear to half the screen resolution and doubled from there, at a fraction of the cost
+    of a bilinear scale to the full resolution.
+    """
+    def __init__(self, scale: int = 4, ambient: tuple[int, int, int] = (128, 128, 128)):
+        self.scale = scale
+        self.ambient = ambient
+        # one extra pixel for the part of the screen past the last whole lightmap pixel
+        size = (SCREEN_WIDTH // scale + 2, SCREEN_HEIGHT // scale + 2)
+        self.surface = pygame.Surface(size)
+        self.half_scaled = pygame.Surface((size[0] * scale // 2, size[1] * scale // 2))
+        self.upscaled = pygame.Surface((size[0] * scale, size[1] * scale))
+        self.origin = (0, 0)
+
+    def begin(self, offset: tuple[int, int]) -> None:
+        self.origin = (offset[0] - offset[0] % self.scale, offset[1] - offset[1] % self.scale)
+        self.surface.fill(self.ambient)
+
+    def to_map(self, world_pos: tuple[float, float]) -> tuple[int, int]:
+        return (int((world_pos[0] - self.origin[0]) // self.scale),
+                int((world_pos[1] - self.origin[1]) // self.scale))
+
+    def light_blit(self, world_pos: tuple[float, float], radius: float, color: tuple[int, int, int]) -> tuple:
+        map_radius = max(1, round(radius / self.scale))
+        x, y = self.to_map(world_pos)
+        return falloff_sprite(map_radius, color), (x - map_radius, y - map_radius), None, pygame.BLEND_RGB_ADD
+
+    def add_lights(self, lights) -> None:
+        """
+        lights: (world_pos, radius, color) of every light, blitted in one batch
+        """
+        self.surface.blits(tuple(self.light_blit(*light) for light in lights), False)
+
+    def composite(self, screen: pygame.Surface | TextureScreen, offset: tuple[int, int]) -> None:
+        pygame.transform.smoothscale(self.surface, self.half_scaled.get_size(), self.half_scaled)
+        pos = (self.origin[0] - offset[0], self.origin[1] - offset[1])
+        if isinstance(screen, TextureScreen):
+            # the renderer does the doubling and the multiplying
+            screen.stream(self.half_scaled, pygame.Rect(pos, self.upscaled.get_size()), pygame.BLEND_RGB_MULT)
+            return
+        pygame.transform.scale(self.half_scaled, self.upscaled.get_size(), self.upscaled)
+        screen.blit(self.upscaled, pos, special_flags=pygame.BLEND_RGB_MULT)
+
+
+class ChunkLights:
+    """
+    Static lights of one chunk, baked into one piece of lightmap that is added with a single blit.
+    It reaches max_radius past the chunk on every side, lights are (world_pos, radius, color).
+    """
+    def __init__(self, chunk_key: tuple[int, int], scale: int = 4, max_radius: int = 128):
+        self.scale = scale
+        self.rect = pygame.Rect(chunk_key[0] * CHUNK_RES, chunk_key[1] * CHUNK_RES,
+                                CHUNK_RES, CHUNK_RES).inflate(2 * max_radius, 2 * max_radius)
+        self.lights = []
+        self.image = pygame.Surface((self.rect.w // scale, self.rect.h // scale))
+        self.dirty = True
+
+    def __len__(self) -> int:
+        return len(self.lights)
+
+    def set_lights(self, lights: list) -> None:
+        self.lights = list(lights)
+        self.dirty = True
+
+    def bake(self) -> None:
+        self.image.fill((0, 0, 0))
+        blits = []
+        for world_pos, radius, color in self.lights:
+            map_radius = max(1, round(radius / self.scale))
+            pos = ((world_pos[0] - self.rect.x) // self.scale - map_radius,
+                   (world_pos[1] - self.rect.y) // self.scale - map_radius)
+            blits.append((falloff_sprite(map_radius, color), pos, None, pygame.BLEND_RGB_ADD))
+        self.image.blits(blits, False)
+        self.dirty = False
+
+    def draw(self, lightmap: Lightmap) -> None:
+        if not self.lights:
+            return
+        if self.dirty:
+            self.bake()
+        lightmap.surface.blit(self.image, lightmap.to_map(self.rect.topleft), special_flags=pygame.BLEND_RGB_ADD)
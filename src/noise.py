@@ -1,11 +1,16 @@
 
 import random
 import numpy as np
-import scipy
-from matplotlib import pyplot as plt
+
+from chunk_map import CHAR_CODES
+from terrain import surface_tiles
+
+# scipy and matplotlib are slow to import and only needed for generating and plotting,
+# so they are imported where they are used
 
 
 def value_noise_lerp(my_len, n_octaves=6):
+    from matplotlib import pyplot as plt
     powers_of_2 = tuple(pow(2, i) for i in range(n_octaves))
     xs = [np.arange(0, my_len, i) for i in powers_of_2]
     random_ys = [[random.uniform(0, power_of_2) for _ in range(0, my_len, power_of_2)] for power_of_2 in powers_of_2]
@@ -27,6 +32,7 @@ def value_noise_lerp(my_len, n_octaves=6):
 
 
 def make_cubic_spline_octave(length, interval, height):
+    import scipy.interpolate
     x1 = np.arange(0, length, interval)
     y1 = [random.uniform(0, height) for _ in x1]
     return scipy.interpolate.CubicSpline(x1, y1, bc_type="natural")
@@ -41,6 +47,7 @@ def value_noise_cubic_spline(my_len, n_octaves: int = 6, plot: bool = False, ret
     ans = sum(ys)
 
     if plot:
+        from matplotlib import pyplot as plt
         fig, axs = plt.subplots(n_octaves+1, 1, sharex="all", sharey="all")
         fig.suptitle(f"Value noise, CubicSpline, {n_octaves} octaves")
         for ax, y in zip(axs, ys):
@@ -59,6 +66,7 @@ def value_noise_cubic_spline(my_len, n_octaves: int = 6, plot: bool = False, ret
 
 
 def two():
+    from matplotlib import pyplot as plt
     my_len = 256
     noise_list1 = value_noise_cubic_spline(my_len)
     noise_list2 = value_noise_cubic_spline(my_len)
@@ -74,37 +82,15 @@ def noise_list_to_file():
     show = True
     return_ans = True
     noise_list = value_noise_cubic_spline(my_len, n_octaves, show, return_ans)
-    # list of lists still needing transposing
-    level_map_matrix = []
-    for width, gras in enumerate(noise_list):
-        new_list = []
-        for height in range(64):
-            gras = round(gras)
-            if height == gras:
-                new_list.append("G")
-            elif height > gras:
-                new_list.append("D")
-            else:
-                new_list.append("A")
-        level_map_matrix.append(new_list)
-    # list of strings
-    str_list = []
-    for i in range(len(level_map_matrix[0])):
-        new_str = ""
-        for j in range(len(level_map_matrix)):
-            new_str += level_map_matrix[j][i]
-        str_list.append(new_str)
-    # changing dirt with air access to grass
-    for i in range(len(str_list)):
-        str_list[i] = str_list[i].replace("AD", "AG").replace("DA", "GA")
+    # whole map as one array, the edge columns are repeated so they only count as neighbours
+    heights = np.pad(np.rint(noise_list).astype(np.int64), 1, mode="edge")
+    tiles = surface_tiles(heights, 0, 64)[:, 1:-1]
     # file
     with open("level_map_2.txt", 'w') as level_map_file:
-        for i in range(len(level_map_matrix[0])):
-            for j in range(len(level_map_matrix)):
-                level_map_file.write(level_map_matrix[j][i])
-            level_map_file.write("\n")
+        level_map_file.write("\n".join(row.tobytes().decode("ascii") for row in CHAR_CODES[tiles]) + "\n")
 
 
-value_noise_cubic_spline(256, 6, True, False)
-# two()
-# noise_list_to_file()
+if __name__ == "__main__":
+    value_noise_cubic_spline(256, 6, True, False)
+    # two()
+    # noise_list_to_file()
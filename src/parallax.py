@@ -0,0 +1,116 @@
+import math
+
+import numpy as np
+import pygame
+
+from assets import TEXTURE_SCALE, assets
+from global_settings import SCREEN_WIDTH, SCREEN_HEIGHT
+
+COLORKEY = (255, 0, 255)
+
+
+def tiled_strip(image: pygame.Surface, min_width: int = SCREEN_WIDTH) -> pygame.Surface:
+    """
+    Repeats a horizontally tileable image until it is at least min_width wide,
+    so one strip plus one wrapped copy always covers the screen.
+    """
+    width, height = image.get_size()
+    n_tiles = -(-min_width // width)
+    strip = pygame.Surface((n_tiles * width, height)).convert()
+    if (colorkey := image.get_colorkey()) is not None:
+        strip.fill(colorkey)
+    strip.blits(tuple((image, (i * width, 0)) for i in range(n_tiles)), False)
+    if colorkey is not None:
+        strip.set_colorkey(colorkey, pygame.RLEACCEL)
+    return strip
+
+
+def hills(width: int,
+          height: int,
+          color: tuple[int, int, int],
+          seed: int,
+          n_waves: int = 4,
+          scale: int = TEXTURE_SCALE) -> pygame.Surface:
+    """
+    Placeholder art: a silhouette of sine waves with whole periods over the width, so it tiles seamlessly.
+    Drawn at 1/scale of the size and scaled up once, like the textures.
+    """
+    rng = np.random.default_rng(seed)
+    x = np.arange(width // scale) / (width // scale) * 2 * np.pi
+    periods = rng.integers(1, 5, n_waves)
+    amplitudes = rng.uniform(0.2, 1, n_waves)
+    phases = rng.uniform(0, 2 * np.pi, n_waves)
+    wave = sum(a * np.sin(p * x + phase) for a, p, phase in zip(amplitudes, periods, phases))
+    small_height = height // scale
+    tops = np.rint((wave - wave.min()) / np.ptp(wave) * small_height * 0.75).astype(np.int64)
+    pixels = np.empty((len(x), small_height, 3), np.uint8)
+    pixels[:] = COLORKEY
+    pixels[np.arange(small_height) >= tops[:, None]] = color
+    image = pygame.transform.scale_by(pygame.surfarray.make_surface(pixels), scale).convert()
+    image.set_colorkey(COLORKEY, pygame.RLEACCEL)
+    return image
+
+
+def sky(size: tuple[int, int], top_color: tuple[int, int, int], bottom_color: tuple[int, int, int]) -> pygame.Surface:
+    """
+    Placeholder art: a vertical gradient.
+    """
+    t = np.linspace(0, 1, size[1])[:, None]
+    colors = np.rint(np.array(top_color) * (1 - t) + np.array(bottom_color) * t).astype(np.uint8)
+    pixels = np.broadcast_to(colors[None], (size[0], size[1], 3))
+    return pygame.surfarray.make_surface(np.ascontiguousarray(pixels)).convert()
+
+
+class ParallaxLayer:
+    """
+    A pre-rendered strip that scrolls factor times as fast as the camera, horizontally only.
+    y: screen y of the top of the strip
+    A factor of 0 makes the layer static.
+    """
+    def __init__(self, image: pygame.Surface, factor: float, y: int = 0):
+        self.image = tiled_strip(image)
+        self.factor = factor
+        self.y = y
+
+    @classmethod
+    def from_texture(cls, file_name: str, factor: float, y: int = 0) -> "ParallaxLayer":
+        return cls(assets.texture(file_name, COLORKEY), factor, y)
+
+    def blits(self, camera_x: int) -> tuple:
+        """
+        One blit, or two when the strip wraps around on screen.
+        """
+        width = self.image.get_width()
+        x = -(math.floor(camera_x * self.factor) % width)
+        if x + width >= SCREEN_WIDTH:
+            return (self.image, (x, self.y)),
+        return (self.image, (x, self.y)), (self.image, (x + width, self.y))
+
+
+class ParallaxBackground:
+    """
+    Layers 0 to 3 of the level, back to front.
+    The background color and all static layers are flattened into one screen sized surface once,
+    the scrolling layers are drawn with at most two blits each.
+    """
+    def __init__(self, layers: list[ParallaxLayer], background_color: tuple[int, int, int] = (0, 0, 15)):
+        self.static = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)).convert()
+        self.static.fill(background_color)
+        for layer in layers:
+            if layer.factor == 0:
+                self.static.blits(layer.blits(0), False)
+        self.scrolling = [layer for layer in layers if layer.factor != 0]
+
+    @classmethod
+    def placeholder(cls) -> "ParallaxBackground":
+        """
+        Generated art until there are textures for it.
+        """
+        return cls([ParallaxLayer(sky((SCREEN_WIDTH, SCREEN_HEIGHT), (0, 0, 15), (24, 20, 60)), 0),
+                    ParallaxLayer(hills(SCREEN_WIDTH, 320, (20, 18, 50), 1), 0.25, 260),
+                    ParallaxLayer(hills(SCREEN_WIDTH, 280, (14, 14, 38), 2), 0.5, 360),
+                    ParallaxLayer(hills(SCREEN_WIDTH, 240, (8, 10, 26), 3), 0.75, 480)])
+
+    def draw(self, screen: pygame.Surface, offset: tuple[int, int]) -> None:
+        screen.blit(self.static, (0, 0))
+        screen.blits(tuple(blit for layer in self.scrolling for blit in layer.blits(offset[0])), False)
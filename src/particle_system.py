@@ -0,0 +1,143 @@
+from functools import lru_cache
+
+import numpy as np
+import pygame
+
+from global_settings import SCREEN_WIDTH, SCREEN_HEIGHT
+from shapes import CircleParticle
+
+
+@lru_cache(maxsize=1024)
+def circle_sprite(radius: int, color: tuple[int, int, int], width: int = 0) -> pygame.Surface:
+    colorkey = (0, 0, 0) if color != (0, 0, 0) else (255, 255, 255)
+    surf = pygame.Surface((2*radius, 2*radius))
+    surf.fill(colorkey)
+    pygame.draw.circle(surf, color, (radius, radius), radius, width)
+    surf.set_colorkey(colorkey, pygame.RLEACCEL)
+    return surf
+
+
+class CircleParticleSystem:
+    """
+    All circle particles of the level as a structure of arrays, the first n rows are alive.
+    update() moves every particle with a few numpy operations and compacts dead ones (radius <= 0) in bulk,
+    draw() only blits the particles that overlap the screen, from a cache of pre-drawn circles.
+    """
+    def __init__(self, capacity: int = 256):
+        self.n = 0
+        self.pos = np.zeros((capacity, 2))
+        self.vel = np.zeros((capacity, 2))
+        self.acc = np.zeros((capacity, 2))
+        self.radius = np.zeros(capacity)
+        self.radius_decay = np.zeros(capacity)
+        self.color = np.zeros((capacity, 3), np.uint8)
+        self.width = np.zeros(capacity, np.int16)
+
+    def __len__(self) -> int:
+        return self.n
+
+    def reserve(self, n_new: int) -> None:
+        capacity = len(self.radius)
+        if self.n + n_new <= capacity:
+            return
+        while capacity < self.n + n_new:
+            capacity *= 2
+        for name in ("pos", "vel", "acc", "radius", "radius_decay", "color", "width"):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], old.dtype)
+            new[:self.n] = old[:self.n]
+            setattr(self, name, new)
+
+    def emit(self,
+             pos,
+             n_particles: int = 1,
+             radius: float = 8,
+             angle_range: tuple[float, float] = (0, 360),
+             speed: float = 2,
+             acc=(0, 0.01),
+             color: tuple = (255, 255, 255),
+             width: int = 0,
+             radius_decay: float = 0.1,
+             angles: np.ndarray | None = None) -> None:
+        """
+        Same arguments as CircleParticle, n_particles at once.
+        angles: one angle in degrees per particle instead of drawing them from angle_range
+        """
+        if n_particles <= 0:
+            return
+        self.reserve(n_particles)
+        if angles is None:
+            angles = np.random.uniform(*angle_range, n_particles)
+        angles = np.radians(angles)
+        new = slice(self.n, self.n + n_particles)
+        self.pos[new] = pos
+        self.vel[new, 0] = speed * np.cos(angles)
+        self.vel[new, 1] = speed * np.sin(angles)
+        self.acc[new] = acc
+        self.radius[new] = radius
+        self.radius_decay[new] = radius_decay
+        self.color[new] = color
+        self.width[new] = width
+        self.n += n_particles
+
+    def add(self, particle: CircleParticle) -> None:
+        self.reserve(1)
+        i = self.n
+        self.pos[i] = particle.pos
+        self.vel[i] = particle.vel
+        self.acc[i] = particle.acc
+        self.radius[i] = particle.radius
+        self.radius_decay[i] = particle.radius_decay
+        self.color[i] = particle.color[:3]
+        self.width[i] = particle.width
+        self.n += 1
+
+    def update(self) -> None:
+        n = self.n
+        self.vel[:n] += self.acc[:n]
+        self.pos[:n] += self.vel[:n]
+        self.radius[:n] -= self.radius_decay[:n]
+        # pop condition
+        alive = self.radius[:n] > 0
+        if alive.all():
+            return
+        self.n = int(np.count_nonzero(alive))
+        for name in ("pos", "vel", "acc", "radius", "radius_decay", "color", "width"):
+            array = getattr(self, name)
+            array[:self.n] = array[:n][alive]
+
+    def bounding_rect(self, offset: tuple[int, int]) -> pygame.Rect | None:
+        """
+        Screen rect around all particles, None without particles.
+        """
+        n = self.n
+        if not n:
+            return None
+        radius = self.radius[:n] + 1
+        left = np.min(self.pos[:n, 0] - radius) - offset[0]
+        top = np.min(self.pos[:n, 1] - radius) - offset[1]
+        right = np.max(self.pos[:n, 0] + radius) - offset[0]
+        bottom = np.max(self.pos[:n, 1] + radius) - offset[1]
+        return pygame.Rect(int(left), int(top), int(right - left) + 2, int(bottom - top) + 2)
+
+    def draw(self, screen: pygame.Surface, offset: tuple[int, int]) -> int:
+        """
+        Returns the number of particles drawn.
+        """
+        n = self.n
+        if not n:
+            return 0
+        radius = np.rint(self.radius[:n]).astype(np.int32)
+        x = self.pos[:n, 0] - offset[0]
+        y = self.pos[:n, 1] - offset[1]
+        visible = np.flatnonzero((radius >= 1) & (x + radius > 0) & (x - radius < SCREEN_WIDTH)
+                                 & (y + radius > 0) & (y - radius < SCREEN_HEIGHT))
+        if not len(visible):
+            return 0
+        radius = radius[visible]
+        tops = np.stack((x[visible] - radius, y[visible] - radius), axis=1).tolist()
+        colors = [tuple(color) for color in self.color[visible].tolist()]
+        screen.blits(tuple((circle_sprite(r, color, width), top)
+                           for r, color, width, top in zip(radius.tolist(), colors, self.width[visible].tolist(), tops)),
+                     False)
+        return len(visible)
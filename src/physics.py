@@ -0,0 +1,103 @@
+import math
+
+import pygame
+
+from global_settings import FPS
+
+# how far, as a fraction of the move, a box can already be inside of what it touches, for rounding errors
+SWEEP_EPSILON = 1e-9
+
+
+def step_velocity(vel_x: float, vel_y: float,
+                  acc_x: float, acc_y: float,
+                  gravity: float,
+                  air_res_x: float, air_res_y: float,
+                  friction: float) -> tuple[float, float]:
+    """
+    One physics step of a velocity on plain floats, math.tanh is a lot cheaper than np.tanh on scalars.
+    acc: acceleration from the input this step
+    """
+    vel_x += acc_x
+    vel_y += acc_y + gravity
+    # air resistence
+    if vel_x:
+        vel_x *= 1 - math.tanh(abs(vel_x) / air_res_x)
+    if vel_y:
+        vel_y *= 1 - math.tanh(abs(vel_y) / air_res_y)
+    # surface friction
+    if abs(vel_x) <= friction:
+        vel_x = 0
+    elif vel_x > 0:
+        vel_x -= friction
+    else:
+        vel_x += friction
+    return vel_x, vel_y
+
+
+def sweep_aabb(box: tuple[float, float, float, float],
+               move: tuple[float, float],
+               obstacles) -> tuple[float, tuple[int, int], pygame.Rect | None]:
+    """
+    Moves box (left, top, width, height) along move and finds the first of the obstacle rects it runs into.
+    Returns the time of impact as a fraction of move, the contact normal pointing away from the obstacle and
+    the obstacle, or (1, (0, 0), None) if the whole move is free.
+    Obstacles the box already overlaps are ignored, so it can always move out of them.
+    Touching an obstacle only blocks moving into it, sliding along it is free.
+    """
+    left, top, width, height = box
+    right, bottom = left + width, top + height
+    toi, normal, hit = 1.0, (0, 0), None
+    for obstacle in obstacles:
+        # entry and exit time on each axis, an axis without movement either always or never overlaps
+        if move[0] > 0:
+            entry_x, exit_x = (obstacle.left - right) / move[0], (obstacle.right - left) / move[0]
+        elif move[0] < 0:
+            entry_x, exit_x = (obstacle.right - left) / move[0], (obstacle.left - right) / move[0]
+        elif left < obstacle.right and right > obstacle.left:
+            entry_x, exit_x = -math.inf, math.inf
+        else:
+            continue
+        if move[1] > 0:
+            entry_y, exit_y = (obstacle.top - bottom) / move[1], (obstacle.bottom - top) / move[1]
+        elif move[1] < 0:
+            entry_y, exit_y = (obstacle.bottom - top) / move[1], (obstacle.top - bottom) / move[1]
+        elif top < obstacle.bottom and bottom > obstacle.top:
+            entry_y, exit_y = -math.inf, math.inf
+        else:
+            continue
+        entry = max(entry_x, entry_y)
+        # touching counts as an entry at 0
+        if entry < -SWEEP_EPSILON or entry >= min(exit_x, exit_y) or entry > toi or (hit is not None and entry == toi):
+            continue
+        toi, hit = max(entry, 0.0), obstacle
+        # hitting an edge and a corner at the same time, e.g. the seam between two floor tiles, lands on top
+        if entry_x > entry_y:
+            normal = (-1, 0) if move[0] > 0 else (1, 0)
+        else:
+            normal = (0, -1) if move[1] > 0 else (0, 1)
+    return toi, normal, hit
+
+
+class FixedTimestep:
+    """
+    Runs the simulation at a fixed rate, independent of how fast frames get rendered.
+    advance() returns how many steps a frame has to simulate, at most max_steps, time beyond that is dropped
+    so a slow frame doesn't make the next one slower.
+    alpha: how far the render is between the last two steps, for interpolating positions
+    """
+    def __init__(self, rate: int = FPS, max_steps: int = 5):
+        self.dt = 1 / rate
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+
+    def advance(self, frame_time: float) -> int:
+        self.accumulator += frame_time
+        n_steps = min(int(self.accumulator / self.dt), self.max_steps)
+        self.accumulator -= n_steps * self.dt
+        if n_steps == self.max_steps:
+            self.accumulator = min(self.accumulator, self.dt)
+        return n_steps
+
+    @property
+    def alpha(self) -> float:
+        return min(self.accumulator / self.dt, 1.0)
@@ -1,18 +1,15 @@
-import numpy as np
 import pygame
 
-from global_settings import SCREEN_WIDTH, SCREEN_HEIGHT
+from assets import assets
+from physics import step_velocity
 
 
 class PlayerSprite(pygame.sprite.Sprite):
-    def __init__(self, screen_pos_ref: list[float, float]):
+    def __init__(self, pos: tuple[float, float]):
         super().__init__()
-        texture_file_name = "bricks.png"
-        image = pygame.image.load(r"../textures/" + texture_file_name).convert()
-        self.image = pygame.transform.scale_by(image, 4)
-        self.screen_pos_ref = screen_pos_ref
+        self.image = assets.texture("bricks.png")
 
-        self.pos = pygame.math.Vector2(SCREEN_WIDTH/2 + screen_pos_ref[0], SCREEN_HEIGHT/2 + screen_pos_ref[1])
+        self.pos = pygame.math.Vector2(pos)
         self.vel = pygame.math.Vector2(0, 0)
         self.gravity = 1
         self.friction = 1
@@ -24,11 +21,17 @@ class PlayerSprite(pygame.sprite.Sprite):
         self.facing_down = True
         self.on_ground = False
         self.jump_buffer = 0
+        self._rect = None
 
     @property
     def rect(self):
-        return self.image.get_rect(center=(round(self.pos.x) - self.screen_pos_ref[0],
-                                           round(self.pos.y) - self.screen_pos_ref[1]))
+        """
+        World rect, only rebuilt when the rounded position changed.
+        """
+        center = (round(self.pos.x), round(self.pos.y))
+        if self._rect is None or self._rect.center != center:
+            self._rect = self.image.get_rect(center=center)
+        return self._rect
 
     def jump(self):
         if self.stamina > 0:
@@ -38,34 +41,25 @@ class PlayerSprite(pygame.sprite.Sprite):
         elif not self.on_ground:
             self.jump_buffer = 2
 
-    def update(self) -> None:
+    def update(self, pressed_keys=None) -> None:
         # jump buffer
         if self.jump_buffer:
             if self.on_ground:
                 self.jump()
             self.jump_buffer -= 1
         # handling WASD
-        pressed_keys = pygame.key.get_pressed()
+        if pressed_keys is None:
+            pressed_keys = pygame.key.get_pressed()
+        acc_x = acc_y = 0
         if pressed_keys[pygame.K_a]:
-            self.vel.x -= self.acc.x
+            acc_x -= self.acc.x
         if pressed_keys[pygame.K_d]:
-            self.vel.x += self.acc.x
+            acc_x += self.acc.x
         if pressed_keys[pygame.K_s]:
-            self.vel.y += self.acc.y
-        # changes velocity
-        self.vel.y += self.gravity
-        # air resistence
-        if self.vel.x:
-            self.vel.x *= 1 - np.tanh(abs(self.vel.x)/self.air_res.x)
-        if self.vel.y:
-            self.vel.y *= 1 - np.tanh(abs(self.vel.y)/self.air_res.y)
-        # surface friction
-        if abs(self.vel.x) <= self.friction:
-            self.vel.x = 0
-        elif self.vel.x > 0:
-            self.vel.x -= self.friction
-        else:
-            self.vel.x += self.friction
+            acc_y += self.acc.y
+        # changes velocity, air resistence and surface friction
+        self.vel.update(step_velocity(self.vel.x, self.vel.y, acc_x, acc_y, self.gravity,
+                                      self.air_res.x, self.air_res.y, self.friction))
         # facing east or west
         if self.facing_east:
             if self.vel.x < 0:
@@ -0,0 +1,154 @@
+import csv
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+import pygame
+
+from text_sprite import render_text
+
+
+class NullSection:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_SECTION = NullSection()
+
+
+class Section:
+    def __init__(self, profiler: "FrameProfiler", name: str):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.record(self.name, self.start, time.perf_counter() - self.start)
+        return False
+
+
+class FrameProfiler:
+    """
+    Times named sections of every frame, sections can be nested.
+    frames: the last history frames, each a list of (name, start, duration) in seconds
+    While disabled section() hands out one shared do-nothing context manager and nothing is recorded.
+    """
+    OVERLAY_REFRESH = 15
+
+    def __init__(self, enabled: bool = False, history: int = 600):
+        self.enabled = enabled
+        self.overlay = False
+        self.frames = deque(maxlen=history)
+        self.current = None
+        self.frame_count = 0
+        self.overlay_lines = ()
+        self.start_time = time.perf_counter()
+
+    def section(self, name: str):
+        if not self.enabled:
+            return NULL_SECTION
+        return Section(self, name)
+
+    def record(self, name: str, start: float, duration: float) -> None:
+        if self.current is not None:
+            self.current.append((name, start, duration))
+
+    def begin_frame(self) -> None:
+        if not self.enabled:
+            self.current = None
+            return
+        self.current = [("frame", time.perf_counter(), 0.0)]
+
+    def end_frame(self) -> None:
+        if self.current is None:
+            return
+        name, start, _ = self.current[0]
+        self.current[0] = (name, start, time.perf_counter() - start)
+        self.frames.append(self.current)
+        self.current = None
+        self.frame_count += 1
+
+    def stats(self) -> dict:
+        """
+        Per section over the kept frames: mean, p95 and max of its total time per frame in ms.
+        """
+        totals = {}
+        for i, frame in enumerate(self.frames):
+            for name, _, duration in frame:
+                totals.setdefault(name, np.zeros(len(self.frames)))[i] += duration * 1000
+        return {name: {"mean": float(ms.mean()), "p95": float(np.percentile(ms, 95)), "max": float(ms.max())}
+                for name, ms in totals.items()}
+
+    def draw_overlay(self, screen: pygame.Surface, pos: tuple[int, int] = (8, 8)) -> pygame.Rect | None:
+        """
+        Returns the rect drawn over, None if the overlay is off.
+        """
+        if not self.overlay:
+            return None
+        if not self.frame_count % self.OVERLAY_REFRESH or not self.overlay_lines:
+            stats = sorted(self.stats().items(), key=lambda item: -item[1]["mean"])
+            self.overlay_lines = tuple(render_text(f"{name:18} {ms['mean']:6.2f} {ms['p95']:6.2f} {ms['max']:6.2f}",
+                                                   "freesansbold.ttf", 14, (255, 255, 255))
+                                       for name, ms in stats)
+        background = pygame.Rect(pos, (300, 16 * len(self.overlay_lines) + 4))
+        screen.fill((0, 0, 0), background)
+        screen.blits(tuple((line, (pos[0] + 2, pos[1] + 2 + 16 * i)) for i, line in enumerate(self.overlay_lines)),
+                     False)
+        return background
+
+    def export_csv(self, file_name: str) -> None:
+        with open(file_name, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(("frame", "section", "start ms", "duration ms"))
+            for i, frame in enumerate(self.frames):
+                for name, start, duration in frame:
+                    writer.writerow((i, name, round((start - self.start_time) * 1000, 4), round(duration * 1000, 4)))
+
+    def export_chrome_trace(self, file_name: str) -> None:
+        """
+        Open in chrome://tracing or https://ui.perfetto.dev
+        """
+        events = [{"name": name, "ph": "X", "pid": 0, "tid": 0,
+                   "ts": (start - self.start_time) * 1e6, "dur": duration * 1e6}
+                  for frame in self.frames for name, start, duration in frame]
+        with open(file_name, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+
+
+class StartupTimer:
+    """
+    Wall time of each startup phase, from the start of the process to the first frame on screen.
+    start: perf_counter() when the process started, time spent before it is not seen
+    """
+    def __init__(self, start: float | None = None):
+        self.start = time.perf_counter() if start is None else start
+        self.phases = []
+
+    def record(self, name: str, seconds: float) -> None:
+        self.phases.append((name, seconds))
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def report(self) -> str:
+        lines = [f"{name:16} {seconds * 1000:8.1f} ms" for name, seconds in self.phases]
+        lines.append(f"{'first frame at':16} {(time.perf_counter() - self.start) * 1000:8.1f} ms")
+        return "\n".join(lines)
+
+
+# shared by the whole process
+profiler = FrameProfiler()
@@ -0,0 +1,142 @@
+import weakref
+
+import pygame
+from pygame._sdl2 import video
+
+# SDL_BlendMode values
+BLENDMODE_NONE, BLENDMODE_BLEND, BLENDMODE_ADD, BLENDMODE_MOD = 0, 1, 2, 4
+# what the special_flags of Surface.blit become as blend modes of a texture
+BLEND_MODES = {pygame.BLEND_RGB_ADD: BLENDMODE_ADD, pygame.BLEND_RGB_MULT: BLENDMODE_MOD}
+
+# every TextureScreen, for changed()
+screens = weakref.WeakSet()
+
+
+def changed(surface: pygame.Surface) -> None:
+    """
+    Call after drawing onto a surface that was blitted before, otherwise texture screens keep showing its old pixels.
+    """
+    for screen in screens:
+        screen.forget(surface)
+
+
+class TextureScreen:
+    """
+    Stands in for the display surface, blits become textured quads drawn by a pygame._sdl2 Renderer.
+    Supports the part of the Surface interface the level draws with: blit, blits and fill.
+    A surface is uploaded on its first blit, its texture lives as long as the surface does.
+    stream() is for surfaces that change every frame, they are uploaded every time without being cached.
+    """
+    def __init__(self, renderer: video.Renderer, size: tuple[int, int]):
+        self.renderer = renderer
+        self.size = size
+        # {surface: (texture, blend mode of a blit without special_flags)}
+        self.textures = weakref.WeakKeyDictionary()
+        # streaming textures by size
+        self.streams = {}
+        screens.add(self)
+
+    def get_size(self) -> tuple[int, int]:
+        return self.size
+
+    def texture(self, surface: pygame.Surface) -> tuple[video.Texture, int]:
+        if (entry := self.textures.get(surface)) is None:
+            texture = video.Texture.from_surface(self.renderer, surface)
+            entry = self.textures[surface] = (texture, texture.blend_mode)
+        return entry
+
+    def forget(self, surface: pygame.Surface) -> None:
+        self.textures.pop(surface, None)
+
+    def blit(self, source: pygame.Surface, dest, area=None, special_flags: int = 0) -> None:
+        texture, blend_mode = self.texture(source)
+        texture.blend_mode = BLEND_MODES.get(special_flags, blend_mode)
+        # Surface.blit truncates float positions
+        x, y = int(dest[0]), int(dest[1])
+        if area is None:
+            texture.draw(dstrect=(x, y, texture.width, texture.height))
+        else:
+            area = pygame.Rect(area)
+            texture.draw(srcrect=area, dstrect=(x, y, area.w, area.h))
+
+    def blits(self, blit_sequence, doreturn: bool = True) -> None:
+        for blit in blit_sequence:
+            self.blit(*blit)
+
+    def fill(self, color, rect=None) -> None:
+        self.renderer.draw_color = (*color[:3], 255)
+        if rect is None:
+            self.renderer.clear()
+        else:
+            self.renderer.fill_rect(rect)
+
+    def stream(self, surface: pygame.Surface, dest_rect: pygame.Rect, special_flags: int = 0) -> None:
+        """
+        Uploads surface again and draws it stretched over dest_rect, scaled nearest neighbour.
+        """
+        size = surface.get_size()
+        if (texture := self.streams.get(size)) is None:
+            texture = self.streams[size] = video.Texture(self.renderer, size, streaming=True)
+        texture.update(surface)
+        texture.blend_mode = BLEND_MODES.get(special_flags, BLENDMODE_NONE)
+        texture.draw(dstrect=dest_rect)
+
+
+class SurfaceBackend:
+    """
+    Software blits onto the display surface, the fallback that works everywhere.
+    partial_updates: whether present() can update only some rects of the screen, for the dirty rect renderer
+    """
+    name = "surface"
+    partial_updates = True
+
+    def __init__(self, size: tuple[int, int], caption: str = ""):
+        self.screen = pygame.display.set_mode(size)
+        pygame.display.set_caption(caption)
+
+    def present(self, rects=None) -> None:
+        if rects is None:
+            pygame.display.update()
+        else:
+            pygame.display.update(rects)
+
+
+class TextureBackend:
+    """
+    Draws through a pygame._sdl2 Renderer into its own window, with the GPU or with SDL's software renderer.
+    driver: name of the SDL render driver e.g. "opengl" or "software", None lets SDL pick the first one that works
+    pygame.display keeps a hidden 1x1 window, Surface.convert() needs a display surface for its pixel format.
+    """
+    name = "texture"
+    partial_updates = False
+
+    def __init__(self, size: tuple[int, int], caption: str = "", driver: str | None = None):
+        drivers = [info.name for info in video.get_drivers()]
+        if driver is not None and driver not in drivers:
+            raise ValueError(f"no render driver {driver}, available are {drivers}")
+        pygame.display.set_mode((1, 1), pygame.HIDDEN)
+        self.window = video.Window(caption, size)
+        try:
+            self.renderer = video.Renderer(self.window, index=-1 if driver is None else drivers.index(driver))
+        except video.error:
+            self.window.destroy()
+            raise
+        self.screen = TextureScreen(self.renderer, size)
+
+    def present(self, rects=None) -> None:
+        # textures are drawn into a back buffer, it is always shown whole
+        self.renderer.present()
+
+
+def create_backend(name: str, size: tuple[int, int], caption: str = "", driver: str | None = None):
+    """
+    name: "surface" or "texture", falls back to the surface backend if no renderer can be created.
+    """
+    if name == "texture":
+        try:
+            return TextureBackend(size, caption, driver)
+        except (ValueError, video.error, pygame.error) as error:
+            print(f"texture render backend unavailable ({error}), drawing with surfaces")
+    elif name != "surface":
+        raise ValueError(f"unknown render backend {name}")
+    return SurfaceBackend(size, caption)
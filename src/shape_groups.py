@@ -1,6 +1,7 @@
 from abc import ABC
 from collections import deque
 import pygame
+from global_settings import SCREEN_HEIGHT, SCREEN_WIDTH
 from shapes import AbstractShapeSprite
 
 
@@ -20,18 +21,32 @@ class AbstractShapeGroup(ABC):
             particle.draw(screen, screen_pos)
 
 
-class CircleGroup(AbstractShapeGroup):
-
-    def update(self):
-        for particle in self.particle_queue:
-            particle.update()
-        # pop condition
-        while self.particle_queue:
-            if self.particle_queue[0].radius <= 0:
-                self.particle_queue.popleft()
-            else:
-                break
-
-
 class FireflyGroup(AbstractShapeGroup):
-    pass
+    """
+    glow: draw the glow of the fireflies onto the screen, off when their lights go into a lightmap
+    """
+    def __init__(self, glow: bool = True):
+        super().__init__()
+        self.glow = glow
+
+    def __len__(self) -> int:
+        return len(self.particle_queue)
+
+    def rects(self, offset: tuple[int, int]) -> list[pygame.Rect]:
+        return [particle.rect(offset) for particle in self.particle_queue]
+
+    def lights(self) -> list[tuple]:
+        return [particle.light() for particle in self.particle_queue]
+
+    def draw(self, screen: pygame.Surface, offset: tuple[int, int]) -> int:
+        """
+        Only draws the fireflies whose glow overlaps the screen, returns how many.
+        """
+        visible = [particle for particle in self.particle_queue
+                   if -particle.circle_radius < particle.pos.x - offset[0] < SCREEN_WIDTH + particle.circle_radius
+                   and -particle.circle_radius < particle.pos.y - offset[1] < SCREEN_HEIGHT + particle.circle_radius]
+        # all glows in one additive batch, then all the fireflies on top
+        if self.glow:
+            screen.blits(tuple(particle.glow_blit(offset) for particle in visible), False)
+        screen.blits(tuple(particle.square_blit(offset) for particle in visible), False)
+        return len(visible)
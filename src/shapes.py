@@ -1,7 +1,8 @@
+import math
 import random
 from abc import ABC, abstractmethod
+from functools import lru_cache
 
-import numpy as np
 from pygame.math import Vector2
 import pygame.math
 
@@ -70,8 +71,8 @@ class RotatingSquareParticle(AbstractShapeSprite):
         self.angle += self.angle_per_frame
 
     def draw(self, screen: pygame.Surface) -> None:
-        points = tuple((self.radius * np.cos((self.angle + i) * np.pi / 180) + self.pos.x,
-                        self.radius * np.sin((self.angle + i) * np.pi / 180) + self.pos.y)
+        points = tuple((self.radius * math.cos(math.radians(self.angle + i)) + self.pos.x,
+                        self.radius * math.sin(math.radians(self.angle + i)) + self.pos.y)
                        for i in (0, 90, 180, 270))
         pygame.draw.polygon(screen, self.color, points, self.width)
 
@@ -103,6 +104,21 @@ class KiteParticle(AbstractShapeSprite):
         pygame.draw.polygon(screen, self.color, points)
 
 
+@lru_cache(maxsize=None)
+def glow_sprite(radius: int, color: tuple[int, int, int]) -> pygame.Surface:
+    surf = pygame.Surface((2*radius, 2*radius))
+    pygame.draw.circle(surf, color, (radius, radius), radius)
+    surf.set_colorkey((0, 0, 0))
+    return surf
+
+
+@lru_cache(maxsize=None)
+def square_sprite(radius: int, color: tuple[int, int, int]) -> pygame.Surface:
+    surf = pygame.Surface((2*radius, 2*radius))
+    surf.fill(color)
+    return surf
+
+
 class FireflyParticle(AbstractShapeSprite):
     def __init__(self, pos: Vector2):
         self.pos = pos
@@ -111,6 +127,9 @@ class FireflyParticle(AbstractShapeSprite):
         self.square_radius = 4
         self.circle_color = 32, 16, 0
         self.square_color = 255, 191, 31
+        # used instead of the glow when the level has a lightmap
+        self.light_radius = 96
+        self.light_color = 255, 170, 60
         self.acc_options = -0.01, 0, 0.01
 
     def update(self):
@@ -119,17 +138,28 @@ class FireflyParticle(AbstractShapeSprite):
         self.vel.y += random.choice(self.acc_options)
         self.pos += self.vel
 
-    def draw(self, screen: pygame.Surface, screen_pos_ref: list):
-        surf = pygame.Surface((2*self.circle_radius, 2*self.circle_radius))
-        pygame.draw.circle(surf, self.circle_color, (self.circle_radius, self.circle_radius), self.circle_radius)
-        surf.set_colorkey((0, 0, 0))
-
-        screen.blit(surf, (self.pos.x-self.circle_radius - screen_pos_ref[0],
-                           self.pos.y-self.circle_radius - screen_pos_ref[1]),
-                    special_flags=pygame.BLEND_RGB_ADD)
-        pygame.draw.rect(screen, self.square_color, (self.pos.x - self.square_radius - screen_pos_ref[0],
-                                                     self.pos.y - self.square_radius - screen_pos_ref[1],
-                                                     2*self.square_radius, 2*self.square_radius))
+    def glow_blit(self, offset: tuple[int, int]) -> tuple:
+        return (glow_sprite(self.circle_radius, self.circle_color),
+                (self.pos.x - self.circle_radius - offset[0], self.pos.y - self.circle_radius - offset[1]),
+                None,
+                pygame.BLEND_RGB_ADD)
+
+    def square_blit(self, offset: tuple[int, int]) -> tuple:
+        return (square_sprite(self.square_radius, self.square_color),
+                (self.pos.x - self.square_radius - offset[0], self.pos.y - self.square_radius - offset[1]))
+
+    def light(self) -> tuple:
+        return self.pos, self.light_radius, self.light_color
+
+    def rect(self, offset: tuple[int, int]) -> pygame.Rect:
+        # the light is blurred over a few more pixels by the upscaling of the lightmap
+        radius = max(self.circle_radius, self.light_radius)
+        return pygame.Rect(self.pos.x - radius - offset[0],
+                           self.pos.y - radius - offset[1],
+                           2*radius, 2*radius).inflate(16, 16)
+
+    def draw(self, screen: pygame.Surface, offset: tuple[int, int]):
+        screen.blits((self.glow_blit(offset), self.square_blit(offset)), False)
 
 
 class CrescentParticle(AbstractShapeSprite):
@@ -0,0 +1,100 @@
+import pygame
+
+from global_settings import TILE_SIZE
+
+
+class SpatialHash:
+    """
+    Broadphase for dynamic entities: a uniform grid of cell_size world pixels, every cell knowing which
+    entities of each kind have their rect in it.
+    entity: any hashable key, e.g. the map tile of a coin, registered with a kind ("coin", ...) and a world rect
+    Moving only touches cells when the entity crosses into other cells, removing touches only its own cells,
+    so both cost the same no matter how many entities there are.
+    Queries return the entities whose rect overlaps, not just the ones in the same cells.
+    """
+    def __init__(self, cell_size: int = 2 * TILE_SIZE):
+        self.cell_size = cell_size
+        # {(kind, cell_x, cell_y): set of entities}
+        self.cells = {}
+        # {kind: set of entities}
+        self.kinds = {}
+        # {entity: (kind, rect, (x_min, y_min, x_max, y_max))}, cell ranges are inclusive
+        self.entities = {}
+
+    def __len__(self) -> int:
+        return len(self.entities)
+
+    def __contains__(self, entity) -> bool:
+        return entity in self.entities
+
+    def cell_span(self, rect: pygame.Rect) -> tuple[int, int, int, int]:
+        return (rect.left // self.cell_size, rect.top // self.cell_size,
+                (rect.right - 1) // self.cell_size, (rect.bottom - 1) // self.cell_size)
+
+    def link(self, entity, kind: str, span: tuple[int, int, int, int]) -> None:
+        x_min, y_min, x_max, y_max = span
+        for x in range(x_min, x_max + 1):
+            for y in range(y_min, y_max + 1):
+                self.cells.setdefault((kind, x, y), set()).add(entity)
+
+    def unlink(self, entity, kind: str, span: tuple[int, int, int, int]) -> None:
+        x_min, y_min, x_max, y_max = span
+        for x in range(x_min, x_max + 1):
+            for y in range(y_min, y_max + 1):
+                cell = self.cells[(kind, x, y)]
+                cell.discard(entity)
+                # empty cells are dropped, so the grid only grows with the entities in it
+                if not cell:
+                    del self.cells[(kind, x, y)]
+
+    def insert(self, entity, kind: str, rect: pygame.Rect) -> None:
+        if entity in self.entities:
+            self.remove(entity)
+        rect = pygame.Rect(rect)
+        span = self.cell_span(rect)
+        self.entities[entity] = (kind, rect, span)
+        self.kinds.setdefault(kind, set()).add(entity)
+        self.link(entity, kind, span)
+
+    def move(self, entity, rect: pygame.Rect) -> None:
+        kind, old_rect, old_span = self.entities[entity]
+        old_rect.update(rect)
+        span = self.cell_span(old_rect)
+        if span != old_span:
+            self.unlink(entity, kind, old_span)
+            self.link(entity, kind, span)
+            self.entities[entity] = (kind, old_rect, span)
+
+    def remove(self, entity) -> None:
+        kind, _, span = self.entities.pop(entity)
+        self.unlink(entity, kind, span)
+        self.kinds[kind].discard(entity)
+
+    def rect(self, entity) -> pygame.Rect:
+        return self.entities[entity][1]
+
+    def query(self, rect: pygame.Rect, kind: str) -> set:
+        """
+        Entities of kind whose rect overlaps rect, e.g. the coins the player touches.
+        """
+        x_min, y_min, x_max, y_max = self.cell_span(rect)
+        candidates = set()
+        for x in range(x_min, x_max + 1):
+            for y in range(y_min, y_max + 1):
+                if (cell := self.cells.get((kind, x, y))) is not None:
+                    candidates |= cell
+        return {entity for entity in candidates if self.entities[entity][1].colliderect(rect)}
+
+    def pairs(self, kind: str, other_kind: str) -> set[tuple]:
+        """
+        Overlapping (entity of kind, entity of other_kind) pairs.
+        For two entities of the same kind only one of both orders is returned, and no entity is paired with itself.
+        """
+        pairs = set()
+        for entity in self.kinds.get(kind, ()):
+            for other in self.query(self.entities[entity][1], other_kind):
+                if kind != other_kind:
+                    pairs.add((entity, other))
+                elif entity != other and (other, entity) not in pairs:
+                    pairs.add((entity, other))
+        return pairs
@@ -0,0 +1,135 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from chunk_map import TILE_IDS
+from global_settings import CHUNK_SIZE
+
+AIR, DIRT, GRASS, COIN = (TILE_IDS[char] for char in "ADGC")
+MASK = (1 << 64) - 1
+
+
+def hash_uniform(seed: int, stream: int, index: np.ndarray) -> np.ndarray:
+    """
+    Deterministic uniform floats in [0, 1), one per integer index (splitmix64).
+    """
+    salt = np.uint64((seed * 0x632BE59BD9B4E019 + stream * 0x85EBCA77C2B2AE63) & MASK)
+    h = np.asarray(index, np.int64).astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15) ^ salt
+    h ^= h >> np.uint64(30)
+    h *= np.uint64(0xBF58476D1CE4E5B9)
+    h ^= h >> np.uint64(27)
+    h *= np.uint64(0x94D049BB133111EB)
+    h ^= h >> np.uint64(31)
+    return (h >> np.uint64(11)).astype(np.float64) * 2.0**-53
+
+
+def surface_tiles(heights: np.ndarray, y_min: int, n_rows: int) -> np.ndarray:
+    """
+    Tile ids indexed [y, x] for the rows y_min up to y_min + n_rows under a surface.
+    heights: surface row of every column
+    Air above the surface, grass on it and dirt below, dirt next to air on the left or right turns into grass.
+    The outer columns only count as neighbours, they don't get the grass rule themselves.
+    """
+    rows = (y_min + np.arange(n_rows))[:, None]
+    tiles = np.where(rows < heights, AIR, np.where(rows == heights, GRASS, DIRT)).astype(np.uint8)
+    air = tiles == AIR
+    side_air = np.zeros_like(air)
+    side_air[:, 1:-1] = air[:, :-2] | air[:, 2:]
+    tiles[(tiles == DIRT) & side_air] = GRASS
+    return tiles
+
+
+class TerrainGenerator:
+    """
+    Tiles of any chunk straight from a world seed, no map file needed.
+    The surface is value noise like noise.value_noise_cubic_spline: octave i has a point every 2**i units,
+    with a height between 0 and 2**i, interpolated with Catmull-Rom splines. The lattice values are hashed
+    from the seed and their index, so the surface is continuous across chunk borders and the same every time.
+    Tile rows above the surface are air, the surface row is grass and below is dirt,
+    dirt next to air on the left or right turns into grass like the "AD" -> "AG" rule of the txt maps.
+    columns_per_unit: map columns per noise unit, the txt maps have 2
+    coin_chance: chance of a column having a coin floating two tiles above its surface
+    """
+    def __init__(self, seed: int = 0, n_octaves: int = 6, columns_per_unit: int = 2, coin_chance: float = 1/64):
+        self.seed = seed
+        self.n_octaves = n_octaves
+        self.columns_per_unit = columns_per_unit
+        self.coin_chance = coin_chance
+
+    def heights(self, x_min: int, n_columns: int) -> np.ndarray:
+        """
+        Surface row of the columns x_min up to x_min + n_columns.
+        """
+        units = np.arange(x_min, x_min + n_columns) / self.columns_per_unit
+        heights = np.zeros(n_columns)
+        for octave in range(self.n_octaves):
+            interval = 2 ** octave
+            t = units / interval
+            k = np.floor(t).astype(np.int64)
+            f = t - k
+            # every lattice point the columns need, hashed once
+            k_min = k[0] - 1
+            values = interval * hash_uniform(self.seed, octave, np.arange(k_min, k[-1] + 3))
+            p0, p1, p2, p3 = (values[k - k_min + i] for i in (-1, 0, 1, 2))
+            heights += 0.5 * (2*p1 + (p2 - p0)*f + (2*p0 - 5*p1 + 4*p2 - p3)*f**2 + (3*p1 - p0 - 3*p2 + p3)*f**3)
+        return np.rint(heights).astype(np.int64)
+
+    def tiles(self, x_min: int, y_min: int, width: int, height: int) -> np.ndarray:
+        """
+        Tile ids of any rectangle of the world indexed [y, x].
+        """
+        # one extra column on each side for the grass rule
+        heights = self.heights(x_min - 1, width + 2)
+        tiles = surface_tiles(heights, y_min, height)[:, 1:-1]
+        # coins
+        columns = np.arange(x_min, x_min + width)
+        coin_rows = heights[1:-1] - 2 - y_min
+        has_coin = (hash_uniform(self.seed, self.n_octaves, columns) < self.coin_chance) \
+            & (coin_rows >= 0) & (coin_rows < height)
+        tiles[coin_rows[has_coin], np.flatnonzero(has_coin)] = COIN
+        return tiles
+
+    def chunk(self, chunk_key: tuple[int, int]) -> np.ndarray:
+        """
+        Tile ids of one chunk indexed [tile_y, tile_x], same layout as ChunkMap.chunk.
+        """
+        return self.tiles(chunk_key[0] * CHUNK_SIZE, chunk_key[1] * CHUNK_SIZE, CHUNK_SIZE, CHUNK_SIZE)
+
+
+class ProceduralMap:
+    """
+    Same interface as ChunkMap but unbounded, chunks get generated on demand and the last ones are cached.
+    edits: tiles changed with set_tile, {chunk_key: {(tile_y, tile_x): tile_id}}, reapplied after regenerating
+    """
+    def __init__(self, generator: TerrainGenerator, cache_size: int = 256):
+        self.generator = generator
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.edits = {}
+        # chunks are built on worker threads
+        self.lock = threading.Lock()
+
+    def chunk(self, chunk_key: tuple[int, int]) -> np.ndarray:
+        with self.lock:
+            if chunk_key in self.cache:
+                self.cache.move_to_end(chunk_key)
+                return self.cache[chunk_key]
+        tiles = self.generator.chunk(chunk_key)
+        with self.lock:
+            for (tile_y, tile_x), tile_id in self.edits.get(chunk_key, {}).items():
+                tiles[tile_y, tile_x] = tile_id
+            self.cache[chunk_key] = tiles
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return tiles
+
+    def tile(self, x: int, y: int) -> int:
+        return int(self.chunk((x // CHUNK_SIZE, y // CHUNK_SIZE))[y % CHUNK_SIZE, x % CHUNK_SIZE])
+
+    def set_tile(self, x: int, y: int, tile_id: int) -> None:
+        chunk_key = (x // CHUNK_SIZE, y // CHUNK_SIZE)
+        tiles = self.chunk(chunk_key)
+        with self.lock:
+            self.edits.setdefault(chunk_key, {})[(y % CHUNK_SIZE, x % CHUNK_SIZE)] = tile_id
+            tiles[y % CHUNK_SIZE, x % CHUNK_SIZE] = tile_id
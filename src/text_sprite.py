@@ -1,6 +1,24 @@
+from functools import lru_cache
+
 import pygame
 
 
+@lru_cache(maxsize=None)
+def get_font(font_name: str | None, font_size: int) -> pygame.font.Font:
+    return pygame.font.Font(font_name, font_size)
+
+
+@lru_cache(maxsize=512)
+def render_text(message: str,
+                font_name: str | None = None,
+                font_size: int = 50,
+                color: tuple[int, int, int] = (127, 127, 127)) -> pygame.Surface:
+    """
+    Shared, don't draw on or change the alpha of what this returns.
+    """
+    return get_font(font_name, font_size).render(message, False, color)
+
+
 class TextSprite(pygame.sprite.Sprite):
     def __init__(self,
                  message: str,
@@ -11,9 +29,11 @@ class TextSprite(pygame.sprite.Sprite):
                  font_size: int = 50):
         super().__init__()
         self.fade = fade
-        self.font = pygame.font.Font(font_name, font_size)
-        self.image = self.font.render(message, False, color)
+        self.font = get_font(font_name, font_size)
+        self.image = render_text(message, font_name, font_size, color)
         if fade:
+            # the alpha changes, so this one needs its own copy
+            self.image = self.image.copy()
             self.image.set_alpha(254)
         self.rect = self.image.get_rect(center=pos)
 
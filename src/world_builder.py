@@ -0,0 +1,80 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from chunk_map import CHAR_CODES, ChunkMap
+from global_settings import CHUNK_SIZE
+from terrain import TerrainGenerator
+
+
+def build_region(seed: int, chunk_x_min: int, width_chunks: int, height_chunks: int) -> np.ndarray:
+    """
+    Chunk columns chunk_x_min up to chunk_x_min + width_chunks of the world, in the ChunkMap layout.
+    Runs in the worker processes.
+    """
+    grid = TerrainGenerator(seed).tiles(chunk_x_min * CHUNK_SIZE, 0,
+                                        width_chunks * CHUNK_SIZE, height_chunks * CHUNK_SIZE)
+    tiles = grid.reshape(height_chunks, CHUNK_SIZE, width_chunks, CHUNK_SIZE).transpose(2, 0, 1, 3)
+    return np.ascontiguousarray(tiles)
+
+
+def build_world(file_name: str,
+                seed: int,
+                width_chunks: int,
+                height_chunks: int,
+                region_chunks: int = 64,
+                workers: int | None = None,
+                txt_file_name: str | None = None) -> dict:
+    """
+    Generates a whole world region by region on a process pool and streams it into a chunk map file.
+    The chunk map body is chunk columns one after another, so every region is one contiguous write,
+    they are written in order as they come back.
+    txt_file_name: also writes the map as a txt map, through a memmap so regions can fill in their columns
+    Returns throughput numbers.
+    """
+    start = time.perf_counter()
+    width = width_chunks * CHUNK_SIZE
+    height = height_chunks * CHUNK_SIZE
+    txt = None
+    if txt_file_name is not None:
+        # every line ends with a newline
+        txt = np.memmap(txt_file_name, np.uint8, "w+", shape=(height, width + 1))
+        txt[:, -1] = ord("\n")
+    starts = range(0, width_chunks, region_chunks)
+    widths = [min(region_chunks, width_chunks - chunk_x_min) for chunk_x_min in starts]
+    with open(file_name, "wb") as file, ProcessPoolExecutor(workers) as pool:
+        file.write(ChunkMap.HEADER.pack(ChunkMap.MAGIC, ChunkMap.VERSION, CHUNK_SIZE, width_chunks, height_chunks))
+        regions = pool.map(build_region, [seed] * len(widths), starts, widths, [height_chunks] * len(widths))
+        for chunk_x_min, region in zip(starts, regions):
+            file.write(region.tobytes())
+            if txt is not None:
+                x_min = chunk_x_min * CHUNK_SIZE
+                grid = region.transpose(1, 2, 0, 3).reshape(height, -1)
+                txt[:, x_min:x_min + grid.shape[1]] = CHAR_CODES[grid]
+    if txt is not None:
+        txt.flush()
+        del txt
+    seconds = time.perf_counter() - start
+    return {"tiles": width * height,
+            "seconds": seconds,
+            "tiles/s": width * height / seconds,
+            "bytes": os.path.getsize(file_name)}
+
+
+if __name__ == "__main__":
+    # python world_builder.py world.lvl --seed 1 --width 4096 --height 8
+    parser = argparse.ArgumentParser(description="Pre-generate a world into a chunk map file.")
+    parser.add_argument("file_name")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--width", type=int, default=1024, help="width in chunks")
+    parser.add_argument("--height", type=int, default=8, help="height in chunks")
+    parser.add_argument("--region", type=int, default=64, help="chunk columns per job")
+    parser.add_argument("--workers", type=int, default=None, help="processes, defaults to the number of cores")
+    parser.add_argument("--txt", default=None, help="also write a txt map")
+    args = parser.parse_args()
+    result = build_world(args.file_name, args.seed, args.width, args.height, args.region, args.workers, args.txt)
+    print(f"{result['tiles']} tiles in {result['seconds']:.2f} s, {result['tiles/s']:,.0f} tiles/s, "
+          f"{result['bytes']} bytes")